@@ -9,24 +9,46 @@ Acest fișier extinde app.py original cu:
 =============================================================================
 """
 
+import time
+
+# Începutul pornirii procesului, pentru defalcarea timpilor de start
+PROCESS_STARTED = time.perf_counter()
+
 from flask import Flask, request, jsonify, session
 import psycopg2
 from flask_cors import CORS
 import os
 import csv
 import json
-import hashlib
 import secrets
 from datetime import datetime, timedelta
-import pandas as pd
-from recommendations import get_n_recommandation, filter, filter_out, User
+import threading
+# pandas, scikit-learn și numpy (recommendations, snapshot, neighbors) se
+# importă doar la construirea indexului sau în cererile care le folosesc,
+# ca serverul să poată răspunde imediat după pornire
+from auth import PROFILE_CHANNEL, RECOMMENDATION_PROFILE_FIELDS, hash_password, profile_notification
+from cache import TTLCache, SingleFlight, SingleFlightTimeout
+from metrics import Counters, StageEstimates
+from catalog import CatalogManager
+from trending import TrendingCounters
+from taste import TasteStore, recommend_for_taste
+import cold_start
+import taste
 import math
+import gzip
+
+try:
+    # Opțional (pip install brotli): fără el răspunsurile se comprimă doar cu gzip
+    import brotli
+except ImportError:
+    brotli = None
 
 # ============================================================================
 # CONFIGURARE APLICAȚIE FLASK
 # ============================================================================
 
 app = Flask(__name__)
+DEBUG = os.getenv("FLASK_DEBUG", "1") == "1"
 app.secret_key = secrets.token_hex(32)  # Cheie secretă pentru sesiuni
 
 # Permite CORS pentru frontend (care rulează pe alt port)
@@ -39,6 +61,78 @@ DB_NAME = os.getenv("DB_NAME", "postgres")
 DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASS = os.getenv("DB_PASS", "postgres")
 
+# Cache pentru profilul utilizatorilor (skin_type, allergies) folosit la recomandări
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "300"))
+PREWARM_PROFILE_CACHE = os.getenv("PREWARM_PROFILE_CACHE", "1") == "1"
+
+profile_cache = TTLCache(maxsize=PROFILE_CACHE_SIZE, ttl=PROFILE_CACHE_TTL)
+# Profilurile modificate de alte procese (alți workeri, async_app.py) se
+# anunță prin NOTIFY; thread-ul pornit de listen_profile_changes le scoate din cache
+profile_listener = None
+profile_listener_ready = threading.Event()
+# Marchează notificările trimise de acest proces (vezi profile_origin)
+PROFILE_ORIGIN_TOKEN = secrets.token_hex(8)
+
+# Catalogul folosit de recomandări și ponderile implicite ale câmpurilor
+# (ex. RECOMMENDATION_WEIGHTS='{"highlights": 0.4, "ingredients": 0.6}');
+# fără ponderi se folosește documentul unic highlights + ingredients
+CATALOG_CSV = os.getenv("CATALOG_CSV", "store_products.csv")
+# Sursa catalogului din memorie: "db" (tabela products, cu CSV-ul ca
+# rezervă dacă baza de date nu răspunde) sau "csv"
+CATALOG_SOURCE = os.getenv("CATALOG_SOURCE", "db")
+# Încărcare "lean": doar coloanele folosite, tipuri numerice/categoriale,
+# matrice float32 și fără textul brut al ingredientelor după vectorizare
+CATALOG_LEAN = os.getenv("CATALOG_LEAN", "1") == "1"
+# Procese pentru normalizarea textului la build (cataloagele peste
+# NORMALIZE_CHUNK_SIZE rânduri se împart pe bucăți; 1 = fără pool)
+NORMALIZE_JOBS = int(os.getenv("NORMALIZE_JOBS", "1"))
+DEFAULT_WEIGHTS = json.loads(os.getenv("RECOMMENDATION_WEIGHTS") or "null")
+
+# Tabela de vecini generată offline cu neighbors.py (folosită dacă există)
+NEIGHBORS_PATH = os.getenv("NEIGHBORS_PATH", "product_neighbors.npz")
+
+# Reîncărcarea catalogului: token pentru endpoint-ul de admin (nesetat =
+# endpoint dezactivat) și intervalul de verificare a fișierului (0 = oprit)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+CATALOG_WATCH_INTERVAL = float(os.getenv("CATALOG_WATCH_INTERVAL", "0"))
+
+# Bugetul de latență pentru /api/recommendations (0 = fără limită); poate fi
+# suprascris per cerere cu "deadline_ms". Peste buget se răspunde degradat,
+# cu produse populare din aceeași categorie și tip de piele.
+RECOMMENDATION_DEADLINE_MS = float(os.getenv("RECOMMENDATION_DEADLINE_MS", "2000"))
+
+recommendation_counters = Counters("requests", "degraded", "neighbor_hits", "neighbor_misses")
+# Durata obișnuită a scorării, separat pe mod (o scorare ponderată sau
+# jaccard lentă nu blochează cererile implicite)
+scoring_times = StageEstimates(alpha=0.2)
+
+# Cererile identice simultane împart un singur calcul de recomandări
+recommendation_flights = SingleFlight()
+
+# Produse în trend (/api/trending): contoare cu decădere exponențială peste
+# recommendation_history; la pornire se reconstruiesc din cel mult
+# TRENDING_MAX_SCAN_ROWS rânduri
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "24"))
+TRENDING_RECOMMENDED_WEIGHT = float(os.getenv("TRENDING_RECOMMENDED_WEIGHT", "0.25"))
+TRENDING_MAX_SCAN_ROWS = int(os.getenv("TRENDING_MAX_SCAN_ROWS", "500000"))
+
+trending = TrendingCounters(TRENDING_HALF_LIFE_HOURS * 3600, recommended_weight=TRENDING_RECOMMENDED_WEIGHT)
+
+# Vectorii de gust (/api/recommendations/for-user): centroidul produselor
+# vizualizate, cu timp de înjumătățire TASTE_HALF_LIFE_DAYS
+TASTE_HALF_LIFE_DAYS = float(os.getenv("TASTE_HALF_LIFE_DAYS", "30"))
+TASTE_MAX_PRODUCTS = int(os.getenv("TASTE_MAX_PRODUCTS", "200"))
+
+taste_store = TasteStore(TASTE_HALF_LIFE_DAYS * 86400, max_products=TASTE_MAX_PRODUCTS,
+                         cache_size=PROFILE_CACHE_SIZE, cache_ttl=PROFILE_CACHE_TTL)
+
+# Compresia răspunsurilor (gzip / brotli după Accept-Encoding): doar peste
+# COMPRESS_MIN_BYTES, răspunsurile mici nu merită costul de CPU
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/html", "text/plain", "text/css", "application/javascript")
+
 # ============================================================================
 # FUNCȚII HELPER PENTRU BAZA DE DATE
 # ============================================================================
@@ -68,14 +162,6 @@ def get_db_connection():
             password=os.environ.get('DB_PASSWORD', 'glowup_password')
         )
 
-def hash_password(password):
-    """
-    Criptează parola folosind SHA-256.
-    
-    În producție, folosește bcrypt sau argon2 pentru securitate mai bună!
-    SHA-256 este folosit aici pentru simplitate.
-    """
-    return hashlib.sha256(password.encode()).hexdigest()
 
 # Helper: convertește NaN în None pentru JSON valid
 def clean_for_json(obj):
@@ -89,6 +175,431 @@ def clean_for_json(obj):
         return [clean_for_json(i) for i in obj]
     return obj
 
+def get_user_profile(user_id):
+    """
+    Returnează profilul folosit la recomandări: (skin_type, allergies).
+    
+    Citește întâi din profile_cache; la miss interoghează tabela users și
+    pune rezultatul în cache. Returnează None dacă utilizatorul nu există
+    (rezultatele negative nu se pun în cache).
+    """
+    profile = profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+    
+    # Generația de dinaintea citirii: dacă update_user scrie între timp,
+    # profilul citit aici (vechi) nu mai ajunge în cache
+    generation = profile_cache.generation(user_id)
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT skin_type, allergies FROM users WHERE id = %s",
+            (user_id,)
+        )
+        user_data = cur.fetchone()
+    finally:
+        cur.close()
+        conn.close()
+    
+    if not user_data:
+        return None
+    
+    profile = (user_data[0], user_data[1] if user_data[1] else [])
+    profile_cache.set(user_id, profile, generation=generation)
+    return profile
+
+def load_products_from_db():
+    """Citește tabela products într-un DataFrame cu coloanele din CSV."""
+    import pandas as pd
+    from recommendations import apply_catalog_dtypes
+    
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT product_id, product_name, brand_name, price AS price_usd,
+                   out_of_stock, ingredients, highlights, primary_category,
+                   secondary_category, rating, reviews, loves_count,
+                   assigned_skin_type
+            FROM products
+            ORDER BY product_id
+        """)
+        columns = [col[0] for col in cur.description]
+        df_products = pd.DataFrame(cur.fetchall(), columns=columns)
+    finally:
+        cur.close()
+        conn.close()
+    return apply_catalog_dtypes(df_products) if CATALOG_LEAN else df_products
+
+
+def load_catalog_frame():
+    """
+    Catalogul din care se construiesc indexul și snapshot-ul: tabela
+    products (CATALOG_SOURCE=db) sau CSV-ul, folosit și ca rezervă.
+    """
+    if CATALOG_SOURCE == "db":
+        try:
+            df_products = load_products_from_db()
+            if len(df_products):
+                return df_products
+            print("⚠️  Tabela products e goală - catalogul se încarcă din CSV")
+        except Exception as e:
+            print(f"⚠️  Catalogul nu poate fi citit din baza de date ({e}) - folosim CSV-ul")
+    from recommendations import load_catalog
+    return load_catalog(CATALOG_CSV, lean=CATALOG_LEAN)
+
+
+def build_product_index():
+    """Construiește indexul (+ tabela de vecini și snapshot-ul pentru listare)."""
+    timings = {}
+    started = time.perf_counter()
+    
+    def lap(stage):
+        nonlocal started
+        now = time.perf_counter()
+        timings[stage] = now - started
+        started = now
+    
+    from recommendations import ProductIndex
+    from snapshot import CatalogSnapshot
+    lap("imports")
+    df_products = load_catalog_frame()
+    lap("load")
+    index = ProductIndex(df_products, n_jobs=NORMALIZE_JOBS, lean=CATALOG_LEAN)
+    lap("index")
+    index.neighbors = load_neighbor_table(index)
+    lap("neighbors")
+    index.snapshot = CatalogSnapshot(index)
+    lap("snapshot")
+    index.fingerprint = cold_start.catalog_fingerprint(index)
+    lap("fingerprint")
+    
+    print("⏱️  Build catalog: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()))
+    log_memory_report(index)
+    return index
+
+
+def precompute_profile_groups(version):
+    """
+    Recalculează în fundal listele Cold Start ale grupurilor de profil
+    rămase pe versiunea veche a catalogului.
+    """
+    def run():
+        try:
+            conn = get_db_connection()
+        except Exception as e:
+            print(f"⚠️  Grupurile Cold Start nu au fost precalculate (DB indisponibil): {e}")
+            return
+        try:
+            started = time.perf_counter()
+            total, computed = cold_start.precompute_groups(conn, version.index, version.index.fingerprint)
+            print(f"✅ Cold Start: {computed}/{total} grupuri de profil recalculate "
+                  f"în {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            conn.rollback()
+            print(f"⚠️  Eroare la precalcularea grupurilor Cold Start: {e}")
+        finally:
+            conn.close()
+
+    threading.Thread(target=run, name="cold-start-precompute", daemon=True).start()
+
+
+catalog = CatalogManager(build_product_index, source_path=CATALOG_CSV,
+                         on_activate=precompute_profile_groups)
+
+
+def get_product_index():
+    """
+    Returnează indexul versiunii active a catalogului.
+    
+    Blocurile TF-IDF pe câmpuri sunt calculate o singură dată per versiune;
+    ponderile se aplică la fiecare cerere, fără refit. O cerere păstrează
+    indexul primit chiar dacă între timp o reîncărcare activează altul.
+    """
+    return catalog.get()
+
+
+def get_catalog_snapshot():
+    """Snapshot-ul versiunii active, sau None dacă catalogul nu e încă construit."""
+    return get_product_index().snapshot if catalog.ready else None
+
+
+def fetch_product_fields(product_ids, fields):
+    """
+    Citește din DB câmpurile care lipsesc din snapshot (coloane absente din
+    sursa catalogului) pentru o listă de produse. Returnează {product_id: {câmp: val}}.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            f"SELECT product_id, {sql_columns(fields)} FROM products WHERE product_id = ANY(%s)",
+            (list(product_ids),)
+        )
+        return {row[0]: dict(zip(fields, row[1:])) for row in cur.fetchall()}
+    finally:
+        cur.close()
+        conn.close()
+
+
+def snapshot_products(snapshot, positions, fields):
+    """Produsele de pe pozițiile date, completate din DB doar pentru câmpurile lipsă."""
+    products = [snapshot.product(pos, fields) for pos in positions]
+    missing = [f for f in fields if not snapshot.has_field(f)]
+    if missing and products:
+        extra = fetch_product_fields([p['product_id'] for p in products], missing)
+        for product in products:
+            product.update(extra.get(product['product_id'], dict.fromkeys(missing)))
+    return products
+
+
+def log_memory_report(index):
+    """Afișează memoria ocupată de fiecare componentă a indexului."""
+    report = index.memory_report()
+    if index.neighbors is not None:
+        report["neighbors"] = index.neighbors.indices.nbytes + index.neighbors.scores.nbytes
+    total = sum(report.values())
+    print(f"📊 Memorie index ({len(index)} produse, lean={CATALOG_LEAN}): {total / 1e6:.1f} MB")
+    for component, size in report.items():
+        print(f"   - {component}: {size / 1e6:.2f} MB")
+
+
+def load_neighbor_table(index):
+    """
+    Încarcă tabela de vecini precalculați dacă a fost generată pentru
+    exact același catalog (produse și conținut); altfel recomandările se
+    calculează live.
+    """
+    if not os.path.exists(NEIGHBORS_PATH):
+        return None
+    from neighbors import load_neighbors, content_fingerprint
+    from recommendations import COMBINED_FIELD
+    try:
+        table = load_neighbors(NEIGHBORS_PATH)
+    except Exception as e:
+        print(f"⚠️  Nu am putut citi {NEIGHBORS_PATH}: {e}")
+        return None
+    if not table.matches(index.product_ids, content_fingerprint(index.block(COMBINED_FIELD), index.valid)):
+        print(f"⚠️  {NEIGHBORS_PATH} nu corespunde catalogului curent - o ignorăm")
+        return None
+    print(f"ℹ️  Tabela de vecini încărcată: top-{table.k} pentru {len(table.product_ids)} produse")
+    return table
+
+
+def lookup_neighbors(index, ref, count, candidates, keyword):
+    """
+    Recomandări din tabela de vecini precalculați.
+    
+    Filtrele se aplică doar pe cei K vecini ai produsului; returnează None
+    dacă rămân mai puțin de `count`, caz în care se calculează live.
+    """
+    positions = index.neighbors.neighbors(ref)
+    positions = positions[candidates[positions]]
+    if keyword:
+        positions = positions[index.keyword_hits(keyword, positions)]
+    if len(positions) < count:
+        return None
+    return positions[:count]
+
+class NotEnoughProducts(Exception):
+    """Filtrele au lăsat prea puține produse pentru recomandări."""
+
+
+class DeadlineExceeded(Exception):
+    """Bugetul de latență a fost depășit; args[0] este etapa la care s-a oprit."""
+
+
+class Deadline:
+    """Termenul limită al unei cereri (budget_ms falsy = fără limită)."""
+    
+    def __init__(self, budget_ms):
+        self.budget_ms = budget_ms
+        self.expires_at = time.monotonic() + budget_ms / 1000 if budget_ms else None
+    
+    def remaining(self):
+        if self.expires_at is None:
+            return math.inf
+        return self.expires_at - time.monotonic()
+    
+    def check(self, stage, needed=0.0):
+        """Ridică DeadlineExceeded dacă nu mai rămân `needed` secunde."""
+        if self.remaining() < needed:
+            raise DeadlineExceeded(stage)
+
+
+def popularity_fallback(index, ref, count, skin_type, allergies, range_filters=None):
+    """
+    Răspunsul degradat: cele mai populare produse din categoria produsului
+    de referință, potrivite tipului de piele, fără alergenii utilizatorului
+    și în limitele cerute (preț, rating, recenzii).
+    
+    Toate filtrele sunt măști precalculate; nu se parcurg rândurile.
+    """
+    ref_product = index.df.iloc[ref]
+    mask = index.category_mask(ref_product['secondary_category'])
+    if range_filters:
+        mask &= index.range_mask(**range_filters)
+    skin_type = skin_type or ref_product['assigned_skin_type']
+    if isinstance(skin_type, str) and skin_type:
+        mask &= index.skin_type_mask(skin_type)
+    if allergies:
+        mask &= index.allergen_free_mask(allergies)
+    mask[ref] = False
+    
+    return index.popular(count, mask)
+
+
+def compute_recommendations(index, product_id, count, skin_type, allergies, keyword,
+                            range_filters, weights, scorer, deadline):
+    """
+    Pozițiile produselor recomandate pentru product_id (în index.df).
+    
+    skin_type / allergies sunt cele care se aplică efectiv ca filtre.
+    Ridică DeadlineExceeded dacă bugetul nu ajunge pentru o etapă și
+    NotEnoughProducts dacă filtrele lasă mai puțin de 2 produse.
+    """
+    import numpy as np
+    
+    # Filtre pe intervale și tip de piele: măști din indexurile sortate /
+    # posting lists ale indexului, fără parcurgerea rândurilor
+    candidates = index.range_mask(**range_filters)
+    
+    if skin_type:
+        # Păstrează produsele potrivite pentru tipul de piele al utilizatorului
+        candidates &= index.skin_type_mask(skin_type)
+    
+    # Alergenii: mască din vocabularul de ingrediente (nume canonice)
+    if allergies:
+        candidates &= index.allergen_free_mask(allergies)
+        deadline.check("filter_allergies")
+    
+    # Cererile fără ponderi speciale se servesc din tabela de vecini,
+    # dacă filtrele lasă suficienți vecini
+    # Cuvintele cheie: un singur tipar compilat, refolosit de ambele căi
+    if keyword:
+        from recommendations import KeywordMatcher
+        keyword = KeywordMatcher(keyword)
+    
+    if index.neighbors is not None and not weights and scorer == "tfidf":
+        recommendation_indices = lookup_neighbors(index, index.position[product_id], count, candidates, keyword)
+        recommendation_counters.incr(
+            "neighbor_hits" if recommendation_indices is not None else "neighbor_misses"
+        )
+        if recommendation_indices is not None:
+            return recommendation_indices
+    
+    # Filtrul pe text rulează doar pe candidații rămași, peste highlights
+    # pregătit (lowercase) la construirea indexului
+    if keyword:
+        candidates = index.keyword_mask(keyword, candidates)
+        deadline.check("filter_keyword")
+    
+    # Verifică dacă mai sunt produse după filtrare
+    if np.count_nonzero(candidates) < 2:
+        raise NotEnoughProducts()
+    
+    # Scorarea nu poate fi întreruptă: pornește doar dacă durata ei
+    # obișnuită (media mobilă a modului) mai încape în buget; o estimare
+    # veche scade la fiecare refuz și e remăsurată periodic
+    mode = scoring_mode(weights, scorer)
+    if not scoring_times.should_run(mode, deadline.remaining()):
+        raise DeadlineExceeded("scoring")
+    
+    started = time.perf_counter()
+    recommendation_indices = index.recommend(product_id, count, weights=weights, mask=candidates, scorer=scorer)
+    scoring_times.update(mode, time.perf_counter() - started)
+    return recommendation_indices
+
+
+def scoring_mode(weights, scorer):
+    """Cheia estimării de durată: scorer-ul, plus dacă cererea are ponderi."""
+    return f"{scorer}_weighted" if weights else scorer
+
+
+def recommendation_key(index, product_id, count, skin_type, allergies, keyword,
+                       range_filters, weights, scorer, budget_ms):
+    """
+    Cheia de coalescing: tot ce influențează rezultatul, inclusiv versiunea
+    catalogului și bugetul de latență (rezultatul degradat depinde de el).
+    """
+    return (
+        id(index), product_id, count, skin_type or None,
+        tuple(sorted(allergies)), keyword or "",
+        tuple(sorted(range_filters.items())),
+        tuple(sorted((weights or {}).items())),
+        scorer, budget_ms
+    )
+
+
+def ensure_profile_group(cur, skin_type, allergies):
+    """
+    Lista Cold Start a grupului de profil: din profile_recommendations dacă
+    e calculată pentru catalogul activ, altfel o calculează și o salvează.
+    Returnează (index, product_ids) sau None dacă catalogul nu e încă gata.
+    """
+    if not catalog.ready:
+        return None
+    index = get_product_index()
+    product_ids = cold_start.lookup_group(cur, index.fingerprint, skin_type, allergies)
+    if product_ids is None:
+        product_ids = cold_start.store_group(cur, index, index.fingerprint, skin_type, allergies)
+    return index, product_ids
+
+
+def parse_range_filters(source):
+    """
+    Citește filtrele numerice (min_price, max_price, min_rating, min_reviews)
+    din query string sau din body-ul JSON.
+    
+    Ridică ValueError dacă o valoare nu este numerică.
+    """
+    from recommendations import RANGE_FILTERS
+    
+    filters = {}
+    for name in RANGE_FILTERS:
+        value = source.get(name)
+        if value is None or value == '':
+            continue
+        try:
+            filters[name] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} trebuie să fie un număr!")
+    return filters
+
+
+def parse_weights(value):
+    """
+    weights: un obiect {câmp: număr}. Valorile devin float (și intră așa în
+    cheia de coalescing); numele câmpurilor le verifică index.validate_weights.
+    
+    Ridică ValueError pentru alte tipuri sau valori nenumerice.
+    """
+    if value is None:
+        return None
+    if not isinstance(value, dict):
+        raise ValueError("weights trebuie să fie un obiect {câmp: pondere}!")
+    weights = {}
+    for name, weight in value.items():
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not math.isfinite(weight):
+            raise ValueError(f"Ponderea pentru {name} trebuie să fie un număr!")
+        weights[name] = float(weight)
+    return weights
+
+
+def parse_keywords(value):
+    """
+    filter_keyword: un text sau o listă de texte (listele devin tuple,
+    ca să poată intra în cheia de coalescing).
+    
+    Ridică ValueError pentru alte tipuri.
+    """
+    if value is None or isinstance(value, str):
+        return value or ''
+    if isinstance(value, list) and all(isinstance(k, str) for k in value):
+        return tuple(k for k in value if k)
+    raise ValueError("filter_keyword trebuie să fie un text sau o listă de texte!")
+
 # ============================================================================
 # INIȚIALIZARE BAZĂ DE DATE
 # ============================================================================
@@ -118,6 +629,10 @@ def init_db():
     
     if tables_exist:
         print("ℹ️  Tabelele există deja - păstrăm datele existente!")
+        create_product_indexes(cur)
+        cold_start.ensure_table(cur)
+        taste.ensure_table(cur)
+        conn.commit()
         cur.close()
         conn.close()
         return True  # Tabelele există, nu facem nimic
@@ -143,6 +658,8 @@ def init_db():
         );
     """)
     
+    create_product_indexes(cur)
+    
     # Tabel utilizatori - cu parolă pentru autentificare
     cur.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -171,6 +688,11 @@ def init_db():
         );
     """)
     
+    # Recomandări Cold Start precalculate pe grupuri de profil
+    cold_start.ensure_table(cur)
+    # Vectorii de gust ai utilizatorilor (din istoric)
+    taste.ensure_table(cur)
+    
     conn.commit()
     cur.close()
     conn.close()
@@ -178,13 +700,86 @@ def init_db():
     return False  # Tabele noi create
 
 
-def import_csv(filename="store_products.csv"):
+def create_product_indexes(cur):
+    """
+    Creează indexurile care susțin filtrele pe intervale din /api/products.
+    
+    Indexurile sunt parțiale (doar produsele în stoc), ca toate interogările
+    de listare. IF NOT EXISTS le face sigure la fiecare pornire.
+    
+    rating și loves_count au ordinea din SQL_SORT_ORDERS (DESC NULLS LAST),
+    ca sortarea listei să citească indexul în loc să sorteze; variantele
+    vechi (NULLS FIRST) se șterg.
+    """
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_products_price ON products (price) WHERE out_of_stock = 0;")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_products_rating_desc ON products (rating DESC NULLS LAST) WHERE out_of_stock = 0;")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_products_reviews ON products (reviews) WHERE out_of_stock = 0;")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_products_loves_desc ON products (loves_count DESC NULLS LAST) WHERE out_of_stock = 0;")
+    cur.execute("DROP INDEX IF EXISTS idx_products_rating;")
+    cur.execute("DROP INDEX IF EXISTS idx_products_loves;")
+
+
+# Clauza folosită de import_csv(upsert=True): rescrie produsele existente
+UPSERT_PRODUCT_SQL = """
+    ON CONFLICT (product_id) DO UPDATE SET
+        product_name = EXCLUDED.product_name,
+        brand_name = EXCLUDED.brand_name,
+        price = EXCLUDED.price,
+        out_of_stock = EXCLUDED.out_of_stock,
+        ingredients = EXCLUDED.ingredients,
+        highlights = EXCLUDED.highlights,
+        primary_category = EXCLUDED.primary_category,
+        secondary_category = EXCLUDED.secondary_category,
+        rating = EXCLUDED.rating,
+        reviews = EXCLUDED.reviews,
+        loves_count = EXCLUDED.loves_count,
+        assigned_skin_type = EXCLUDED.assigned_skin_type
+"""
+
+
+# Câmpurile fără de care un rând din CSV nu se importă
+REQUIRED_PRODUCT_FIELDS = ("product_id", "product_name", "brand_name", "price_usd")
+
+
+def invalid_product_row(row):
+    """
+    Motivul pentru care un rând din CSV nu se poate importa, sau None.
+    
+    Un rând cu mai puține coloane decât antetul (ex. ultimul rând al unui
+    fișier scris pe jumătate) are valori None.
+    """
+    if None in row or None in row.values():
+        return "numărul de coloane nu corespunde antetului"
+    missing = [field for field in REQUIRED_PRODUCT_FIELDS if not (row.get(field) or '').strip()]
+    if missing:
+        return f"lipsesc {', '.join(missing)}"
+    try:
+        float(row['price_usd'])
+    except ValueError:
+        return f"price_usd nu este un număr ({row['price_usd']})"
+    return None
+
+
+def import_csv(filename="store_products.csv", upsert=False, missing="keep"):
     """
     Importă produsele din fișierul CSV în baza de date.
     
     Parametri:
     - filename: Calea către fișierul CSV cu produse
+    - upsert: Actualizează și produsele existente (folosit la reîncărcarea
+      catalogului); implicit se inserează doar produsele noi
+    - missing: Ce se întâmplă cu produsele din tabelă care nu mai sunt în
+      CSV (doar cu upsert): "keep", "out_of_stock" (marcate fără stoc) sau
+      "delete" (doar la cererea explicită a unui admin)
+    
+    Rândurile incomplete (vezi invalid_product_row) se sar la importul
+    inițial; cu upsert opresc tot importul. Cu upsert, erorile se propagă
+    (după rollback), ca reîncărcarea să nu construiască o versiune nouă
+    peste un import eșuat.
     """
+    if missing not in ("keep", "out_of_stock", "delete"):
+        raise ValueError(f"missing necunoscut: {missing}")
+    
     conn = get_db_connection()
     cur = conn.cursor()
     
@@ -192,26 +787,35 @@ def import_csv(filename="store_products.csv"):
         with open(filename, newline='', encoding='utf-8') as csvfile:
             reader = csv.DictReader(csvfile)
             count = 0
+            product_ids = []
             
             for row in reader:
-                cur.execute(
-                    "SELECT product_id FROM products WHERE product_id=%s;", 
-                    (row['product_id'],)
-                )
+                problem = invalid_product_row(row)
+                if problem:
+                    if upsert:
+                        raise ValueError(f"{filename}, linia {reader.line_num}: {problem}")
+                    print(f"⚠️  {filename}, linia {reader.line_num} sărită: {problem}")
+                    continue
+                product_ids.append(row['product_id'])
+                if not upsert:
+                    cur.execute(
+                        "SELECT product_id FROM products WHERE product_id=%s;", 
+                        (row['product_id'],)
+                    )
                 
-                if cur.fetchone() is None:
+                if upsert or cur.fetchone() is None:
                     cur.execute("""
                         INSERT INTO products (
                             product_id, product_name, brand_name, price, 
                             out_of_stock, ingredients, highlights,
                             primary_category, secondary_category, rating,
                             reviews, loves_count, assigned_skin_type
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
-                    """, (
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """ + (UPSERT_PRODUCT_SQL if upsert else "") + ";", (
                         row['product_id'], 
                         row['product_name'], 
                         row['brand_name'], 
-                        float(row['price_usd']) if row['price_usd'] else 0,
+                        float(row['price_usd']),
                         int(row['out_of_stock']) if row['out_of_stock'] else 0,
                         row.get('ingredients', ''),
                         row.get('highlights', ''),
@@ -223,15 +827,34 @@ def import_csv(filename="store_products.csv"):
                         row.get('assigned_skin_type', '')
                     ))
                     count += 1
+        
+        if upsert:
+            # Un CSV gol ar goli tabela: mai degrabă o eroare de export
+            if not product_ids:
+                raise ValueError(f"{filename} nu conține niciun produs")
+            # Produsele scoase din CSV (discontinuate)
+            if missing == "delete":
+                cur.execute("DELETE FROM products WHERE NOT (product_id = ANY(%s));", (product_ids,))
+                print(f"🗑️  {cur.rowcount} produse care nu mai sunt în CSV au fost șterse")
+            elif missing == "out_of_stock":
+                cur.execute("""
+                    UPDATE products SET out_of_stock = 1
+                    WHERE out_of_stock = 0 AND NOT (product_id = ANY(%s));
+                """, (product_ids,))
+                print(f"📦 {cur.rowcount} produse care nu mai sunt în CSV au fost marcate fără stoc")
                     
         conn.commit()
         print(f"✅ {count} produse importate cu succes!")
         
     except FileNotFoundError:
         print(f"⚠️ Fișierul {filename} nu a fost găsit!")
+        if upsert:
+            raise
     except Exception as e:
         print(f"❌ Eroare la import: {e}")
         conn.rollback()
+        if upsert:
+            raise
     finally:
         cur.close()
         conn.close()
@@ -425,6 +1048,10 @@ def login():
             )
             conn.commit()
             
+            # Pre-încălzește cache-ul: utilizatorul va cere recomandări imediat
+            if PREWARM_PROFILE_CACHE:
+                profile_cache.set(user[0], (user[5], user[6] if user[6] else []))
+            
             return jsonify({
                 "success": True,
                 "message": "Login reușit!",
@@ -528,11 +1155,32 @@ def update_user(user_id):
             }), 400
             
         values.append(user_id)
-        query = f"UPDATE users SET {', '.join(updates)} WHERE id = %s"
+        query = f"UPDATE users SET {', '.join(updates)} WHERE id = %s RETURNING skin_type, allergies"
         
         cur.execute(query, values)
+        updated = cur.fetchone()
+        # Ceilalți workeri / serverul asincron își invalidează profilul din cache
+        # (NOTIFY se livrează la commit)
+        if updated and any(f in data for f in RECOMMENDATION_PROFILE_FIELDS):
+            cur.execute("SELECT pg_notify(%s, %s)",
+                        (PROFILE_CHANNEL, profile_notification(user_id, updated[0], updated[1],
+                                                               origin=profile_origin())))
         conn.commit()
         
+        # Write-through: profilul proaspăt (din RETURNING) înlocuiește intrarea veche
+        profile_cache.invalidate(user_id)
+        if updated:
+            profile_cache.set(user_id, (updated[0], updated[1] if updated[1] else []))
+        
+        # Profil nou -> grupul lui trebuie să aibă lista calculată
+        if updated and ('skin_type' in data or 'allergies' in data):
+            try:
+                ensure_profile_group(cur, updated[0], updated[1] or [])
+                conn.commit()
+            except psycopg2.Error as e:
+                conn.rollback()
+                print(f"⚠️  Grupul Cold Start nu a fost precalculat: {e}")
+        
         print(f"✅ Profil Cold Start actualizat pentru user {user_id}")
         
         return jsonify({
@@ -542,6 +1190,7 @@ def update_user(user_id):
         
     except Exception as e:
         conn.rollback()
+        profile_cache.invalidate(user_id)
         return jsonify({
             "success": False,
             "error": str(e)
@@ -558,8 +1207,123 @@ def update_user(user_id):
 
 @app.route("/api/health")
 def health():
-    """Verifică dacă serverul funcționează."""
-    return jsonify({"status": "ok", "message": "Serverul funcționează! 🎉"})
+    """Verifică dacă serverul funcționează (și dacă indexul de recomandări e gata)."""
+    return jsonify({
+        "status": "ok",
+        "message": "Serverul funcționează! 🎉",
+        "catalog_ready": catalog.ready
+    })
+
+
+@app.route("/api/catalog/version")
+def catalog_version():
+    """Versiunea activă a catalogului, durata build-ului și starea reîncărcării."""
+    return jsonify({"success": True, **catalog.status()})
+
+
+@app.route("/api/admin/reload-catalog", methods=['POST'])
+def reload_catalog():
+    """
+    Reîncarcă catalogul fără downtime (build în fundal + schimbare atomică).
+    
+    Header: X-Admin-Token: <ADMIN_TOKEN>
+    Body JSON opțional: {"sync_db": true} - actualizează întâi și tabela
+    products din CSV (import_csv cu upsert); produsele care nu mai sunt în
+    CSV se șterg (singura cale care le șterge).
+    
+    Returnează 202 dacă reîncărcarea a pornit, 409 dacă una e deja în curs.
+    """
+    if not ADMIN_TOKEN or not secrets.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+        return jsonify({
+            "success": False,
+            "error": "Acces interzis!"
+        }), 403
+    
+    data = request.get_json(silent=True) or {}
+    before_build = (lambda: import_csv(CATALOG_CSV, upsert=True, missing="delete")) if data.get('sync_db') else None
+    
+    if not catalog.reload_async(before_build):
+        return jsonify({
+            "success": False,
+            "error": "O reîncărcare este deja în curs!",
+            **catalog.status()
+        }), 409
+    
+    return jsonify({
+        "success": True,
+        "message": "Reîncărcarea catalogului a pornit.",
+        **catalog.status()
+    }), 202
+
+
+@app.route("/api/metrics")
+def metrics():
+    """Returnează metrici interne (cache-uri) pentru monitorizare."""
+    return jsonify({
+        "success": True,
+        "profile_cache": profile_cache.stats(),
+        "catalog": catalog.status(),
+        "recommendations": {
+            **recommendation_counters.snapshot(),
+            "deadline_ms": RECOMMENDATION_DEADLINE_MS,
+            "scoring_time_ms": scoring_times.snapshot(),
+            "coalescing": recommendation_flights.stats()
+        },
+        "trending": trending.stats(),
+        "taste_cache": taste_store.cache.stats(),
+        "profile_listener": profile_listener_ready.is_set()
+    })
+
+
+# Câmpurile din /api/products și ordinea lor
+LIST_FIELDS = [
+    "product_id", "product_name", "brand_name", "price", "primary_category",
+    "secondary_category", "rating", "reviews", "loves_count", "skin_type",
+    "highlights", "ingredients"
+]
+
+# Setul implicit pentru listare: tot ce afișează cardurile, fără ingrediente
+# (până la 20.000 de caractere / produs); se cer explicit cu fields=...,ingredients
+LIST_DEFAULT_FIELDS = [f for f in LIST_FIELDS if f != "ingredients"]
+
+# Coloana din tabela products pentru fiecare câmp din răspuns (unde diferă)
+SQL_COLUMNS = {"skin_type": "assigned_skin_type"}
+
+# Aceleași sortări ca în snapshot, pentru ramura SQL
+SQL_SORT_ORDERS = {
+    "loves_count": "loves_count DESC NULLS LAST",
+    "rating": "rating DESC NULLS LAST",
+    "price": "price ASC NULLS LAST",
+}
+
+# Câmpurile din /api/product/<id>
+DETAIL_FIELDS = [
+    "product_id", "product_name", "brand_name", "price", "ingredients",
+    "highlights", "primary_category", "secondary_category", "rating",
+    "reviews", "loves_count", "skin_type"
+]
+
+
+def parse_fields(value, allowed, default):
+    """
+    Proiecția cerută prin fields= ("a,b,c" sau listă JSON), în ordinea din allowed.
+    
+    product_id e inclus mereu; un câmp necunoscut ridică ValueError.
+    """
+    if not value:
+        return list(default)
+    requested = value.split(",") if isinstance(value, str) else value
+    requested = {str(f).strip() for f in requested if str(f).strip()}
+    unknown = requested.difference(allowed)
+    if unknown:
+        raise ValueError(f"Câmpuri necunoscute: {', '.join(sorted(unknown))} (disponibile: {', '.join(allowed)})")
+    requested.add("product_id")
+    return [f for f in allowed if f in requested]
+
+
+def sql_columns(fields):
+    """Lista SELECT pentru câmpurile cerute."""
+    return ", ".join(SQL_COLUMNS.get(f, f) for f in fields)
 
 
 @app.route("/api/products")
@@ -573,21 +1337,59 @@ def list_products():
     - category: Filtrează după categorie
     - skin_type: Filtrează după tip de piele
     - search: Caută în numele produsului
+    - min_price, max_price: Interval de preț
+    - min_rating: Rating minim
+    - min_reviews: Număr minim de recenzii
+    - sort: loves_count (implicit), rating sau price
+    - fields: câmpurile returnate, separate prin virgulă (implicit toate
+      în afară de ingredients)
+    
+    Răspunsul vine din snapshot-ul in-memory al catalogului; baza de date
+    e folosită doar dacă snapshot-ul nu e încă construit.
     """
     limit = request.args.get('limit', 50, type=int)
     offset = request.args.get('offset', 0, type=int)
     category = request.args.get('category', '')
     skin_type = request.args.get('skin_type', '')
     search = request.args.get('search', '')
+    sort = request.args.get('sort', 'loves_count')
+    
+    try:
+        fields = parse_fields(request.args.get('fields'), LIST_FIELDS, LIST_DEFAULT_FIELDS)
+        range_filters = parse_range_filters(request.args)
+        if sort not in SQL_SORT_ORDERS:
+            raise ValueError(f"Sortare necunoscută: {sort} (disponibile: {', '.join(SQL_SORT_ORDERS)})")
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    
+    snapshot = get_catalog_snapshot()
+    if snapshot is not None:
+        positions = snapshot.query(
+            category=category,
+            skin_type=skin_type,
+            search=search,
+            range_filters=range_filters,
+            sort=sort,
+            limit=limit,
+            offset=offset
+        )
+        return jsonify({
+            "success": True,
+            "products": clean_for_json(snapshot_products(snapshot, positions, fields)),
+            "total": snapshot.total_in_stock,
+            "limit": limit,
+            "offset": offset
+        })
     
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
-        query = """
-            SELECT product_id, product_name, brand_name, price, 
-                   primary_category, secondary_category, rating, 
-                   reviews, loves_count, assigned_skin_type, highlights, ingredients
+        query = f"""
+            SELECT {sql_columns(fields)}
             FROM products 
             WHERE out_of_stock = 0
         """
@@ -604,28 +1406,27 @@ def list_products():
         if search:
             query += " AND (product_name ILIKE %s OR brand_name ILIKE %s)"
             params.extend([f'%{search}%', f'%{search}%'])
+        
+        # Filtre pe intervale (folosesc indexurile din create_product_indexes)
+        if 'min_price' in range_filters:
+            query += " AND price >= %s"
+            params.append(range_filters['min_price'])
+        if 'max_price' in range_filters:
+            query += " AND price <= %s"
+            params.append(range_filters['max_price'])
+        if 'min_rating' in range_filters:
+            query += " AND rating >= %s"
+            params.append(range_filters['min_rating'])
+        if 'min_reviews' in range_filters:
+            query += " AND reviews >= %s"
+            params.append(range_filters['min_reviews'])
             
-        query += " ORDER BY loves_count DESC LIMIT %s OFFSET %s"
+        query += f" ORDER BY {SQL_SORT_ORDERS[sort]} LIMIT %s OFFSET %s"
         params.extend([limit, offset])
         
         cur.execute(query, params)
         
-        products = []
-        for row in cur.fetchall():
-            products.append({
-                "product_id": row[0],
-                "product_name": row[1],
-                "brand_name": row[2],
-                "price": row[3],
-                "primary_category": row[4],
-                "secondary_category": row[5],
-                "rating": row[6],
-                "reviews": row[7],
-                "loves_count": row[8],
-                "skin_type": row[9],
-                "highlights": row[10],
-                "ingredients": row[11]
-            })
+        products = [dict(zip(fields, row)) for row in cur.fetchall()]
         
         # Obține și numărul total pentru paginare
         cur.execute("SELECT COUNT(*) FROM products WHERE out_of_stock = 0")
@@ -646,38 +1447,39 @@ def list_products():
 
 @app.route("/api/product/<product_id>")
 def get_product(product_id):
-    """Returnează detaliile unui produs specific."""
+    """
+    Returnează detaliile unui produs specific (din snapshot, cu DB la miss).
+    
+    Query parameter opțional fields: câmpurile returnate (implicit toate).
+    """
+    try:
+        fields = parse_fields(request.args.get('fields'), DETAIL_FIELDS, DETAIL_FIELDS)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    
+    snapshot = get_catalog_snapshot()
+    pos = snapshot.position(product_id) if snapshot is not None else None
+    if pos is not None:
+        return jsonify({
+            "success": True,
+            "product": clean_for_json(snapshot_products(snapshot, [pos], fields)[0])
+        })
+    
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
-        cur.execute("""
-            SELECT product_id, product_name, brand_name, price, 
-                   ingredients, highlights, primary_category, 
-                   secondary_category, rating, reviews, loves_count,
-                   assigned_skin_type
-            FROM products WHERE product_id = %s
-        """, (product_id,))
+        cur.execute(f"SELECT {sql_columns(fields)} FROM products WHERE product_id = %s", (product_id,))
         
         row = cur.fetchone()
         
         if row:
             return jsonify({
                 "success": True,
-                "product": {
-                    "product_id": row[0],
-                    "product_name": row[1],
-                    "brand_name": row[2],
-                    "price": row[3],
-                    "ingredients": row[4],
-                    "highlights": row[5],
-                    "primary_category": row[6],
-                    "secondary_category": row[7],
-                    "rating": row[8],
-                    "reviews": row[9],
-                    "loves_count": row[10],
-                    "skin_type": row[11]
-                }
+                "product": dict(zip(fields, row))
             })
         else:
             return jsonify({
@@ -690,9 +1492,69 @@ def get_product(product_id):
         conn.close()
 
 
+@app.route("/api/trending")
+def get_trending():
+    """
+    Returnează produsele în trend (vizualizări și recomandări recente).
+    
+    Query parameters opționale:
+    - limit: Număr de produse (default: 20)
+    - category: Doar produsele din categoria dată
+    - skin_type: Doar produsele pentru tipul de piele dat
+    - fields: câmpurile returnate (ca la /api/products)
+    
+    Scorurile vin din contoarele in-memory cu decădere exponențială
+    (timp de înjumătățire TRENDING_HALF_LIFE_HOURS), nu din baza de date.
+    """
+    limit = request.args.get('limit', 20, type=int)
+    category = request.args.get('category', '')
+    skin_type = request.args.get('skin_type', '')
+    
+    try:
+        fields = parse_fields(request.args.get('fields'), LIST_FIELDS, LIST_DEFAULT_FIELDS)
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    
+    snapshot = get_catalog_snapshot()
+    if snapshot is None:
+        return jsonify({
+            "success": False,
+            "error": "Catalogul se încarcă, reîncearcă în câteva secunde."
+        }), 503, {"Retry-After": "2"}
+    
+    # Doar produsele din catalog, în stoc, care respectă filtrele
+    mask = snapshot.mask(category=category, skin_type=skin_type)
+    position = snapshot.index.position
+    
+    def allowed(product_id):
+        pos = position.get(product_id)
+        return pos is not None and mask[pos]
+    
+    ranked = trending.top(max(limit, 0), allowed)
+    products = snapshot_products(snapshot, [position[pid] for pid, _ in ranked], fields)
+    for product, (_, score) in zip(products, ranked):
+        product["trending_score"] = round(score, 4)
+    
+    return jsonify({
+        "success": True,
+        "products": clean_for_json(products),
+        "half_life_hours": TRENDING_HALF_LIFE_HOURS
+    })
+
+
 @app.route("/api/categories")
 def get_categories():
     """Returnează lista de categorii disponibile."""
+    snapshot = get_catalog_snapshot()
+    if snapshot is not None:
+        return jsonify({
+            "success": True,
+            "categories": snapshot.categories
+        })
+    
     conn = get_db_connection()
     cur = conn.cursor()
     
@@ -720,6 +1582,13 @@ def get_categories():
 # ENDPOINT-URI API - RECOMANDĂRI
 # ============================================================================
 
+# Câmpurile produselor recomandate și ordinea lor
+RECOMMENDATION_FIELDS = [
+    "product_id", "product_name", "brand_name", "price", "rating", "reviews",
+    "loves_count", "skin_type", "highlights", "primary_category", "secondary_category"
+]
+
+
 @app.route("/api/recommendations", methods=['POST'])
 def get_recommendations():
     """
@@ -732,11 +1601,26 @@ def get_recommendations():
         "count": 5,                        // Optional: număr de recomandări (default: 5)
         "filter_skin_type": true,          // Optional: filtrează după tipul de piele
         "filter_allergies": true,          // Optional: exclude alergeni
-        "filter_keyword": "hypoallergenic" // Optional: keyword suplimentar
+        "filter_keyword": "hypoallergenic", // Optional: keyword suplimentar sau listă
+                                           // (rămân produsele cu oricare dintre ele)
+        "weights": {                       // Optional: ponderi pe câmpuri / termeni
+            "highlights": 0.3,
+            "ingredients": 0.7,
+            "rating": 0.1                  // price, rating, brand sunt opționale
+        },
+        "scorer": "tfidf",                 // Optional: tfidf, jaccard sau overlap (ingrediente)
+        "min_price": 10,                   // Optional: filtre pe intervale
+        "max_price": 50,
+        "min_rating": 4,
+        "min_reviews": 100,
+        "deadline_ms": 500,                // Optional: buget de latență (implicit RECOMMENDATION_DEADLINE_MS)
+        "fields": ["product_name", "price"] // Optional: câmpurile produselor recomandate (implicit toate)
     }
     
     Returnează:
     - Lista de produse recomandate cu detalii complete
+    - degraded: true dacă bugetul de latență a fost depășit și lista vine
+      din fallback-ul de popularitate
     """
     data = request.json
     product_id = data.get('product_id')
@@ -744,8 +1628,7 @@ def get_recommendations():
     count = data.get('count', 5)
     filter_skin_type = data.get('filter_skin_type', False)
     filter_allergies = data.get('filter_allergies', False)
-    filter_keyword = data.get('filter_keyword', '')
-    
+    scorer = data.get('scorer', 'tfidf')
     if not product_id:
         return jsonify({
             "success": False,
@@ -753,84 +1636,96 @@ def get_recommendations():
         }), 400
     
     try:
-        # Încarcă DataFrame-ul cu produse
-        df_products = pd.read_csv("store_products.csv", dtype=str, low_memory=False)
+        range_filters = parse_range_filters(data)
+        filter_keyword = parse_keywords(data.get('filter_keyword'))
+        weights = parse_weights(data.get('weights') or DEFAULT_WEIGHTS)
+        deadline = Deadline(float(data.get('deadline_ms', RECOMMENDATION_DEADLINE_MS)))
+        fields = parse_fields(data.get('fields'), RECOMMENDATION_FIELDS, RECOMMENDATION_FIELDS)
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    
+    # La pornire indexul se construiește în fundal; până e gata nu blocăm cererea
+    if not catalog.ready and catalog.building:
+        return jsonify({
+            "success": False,
+            "error": "Indexul de recomandări se încarcă, reîncearcă în câteva secunde."
+        }), 503, {"Retry-After": "2"}
+    
+    import pandas as pd
+    
+    try:
+        # Indexul (și DataFrame-ul cu produse) sunt construite o singură dată
+        index = get_product_index()
+        df_products = index.df
         
         # Verifică dacă produsul există
-        if product_id not in df_products['product_id'].values:
+        if product_id not in index.position:
             return jsonify({
                 "success": False,
                 "error": f"Produsul {product_id} nu a fost găsit!"
             }), 404
         
+        try:
+            index.validate_weights(weights or {}, scorer)
+        except (TypeError, ValueError) as e:
+            return jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
+        
         # Obține informații despre utilizator dacă este specificat
         user_skin_type = None
         user_allergies = []
         
         if user_id:
-            conn = get_db_connection()
-            cur = conn.cursor()
-            cur.execute(
-                "SELECT skin_type, allergies FROM users WHERE id = %s",
-                (user_id,)
-            )
-            user_data = cur.fetchone()
-            if user_data:
-                user_skin_type = user_data[0]
-                user_allergies = user_data[1] if user_data[1] else []
-            cur.close()
-            conn.close()
+            profile = get_user_profile(user_id)
+            if profile:
+                user_skin_type, user_allergies = profile
         
-        # Aplică filtre
-        df_filtered = df_products.copy()
-        
-        # Filtru pentru keyword
-        if filter_keyword:
-            df_filtered = filter(df_filtered, column="highlights", keyword=filter_keyword)
-        
-        # Filtru pentru tipul de piele
-        if filter_skin_type and user_skin_type:
-            # Păstrează produsele potrivite pentru tipul de piele al utilizatorului
-            df_filtered = df_filtered[
-                (df_filtered['assigned_skin_type'].str.lower() == user_skin_type.lower()) |
-                (df_filtered['assigned_skin_type'].str.lower() == 'all') |
-                (df_filtered['assigned_skin_type'].isna()) |
-                (df_filtered['assigned_skin_type'] == '')
-            ]
-        
-        # Filtru pentru alergii
-        if filter_allergies and user_allergies:
-            for allergen in user_allergies:
-                df_filtered = filter_out(df_filtered, column="ingredients", keyword=allergen)
-        
-        # Verifică dacă mai sunt produse după filtrare
-        if len(df_filtered) < 2:
+        recommendation_counters.incr("requests")
+        degraded_stage = None
+        
+        # Filtrele care se aplică efectiv (și intră în cheia de coalescing)
+        skin_type_filter = user_skin_type if filter_skin_type else None
+        allergies_filter = user_allergies if filter_allergies else []
+        args = (index, product_id, count, skin_type_filter, allergies_filter, filter_keyword,
+                range_filters, weights, scorer)
+        
+        try:
+            # Cererile identice sosite în timpul calculului așteaptă rezultatul lui,
+            # cel mult cât le mai permite propriul buget
+            recommendation_indices = recommendation_flights.do(
+                recommendation_key(*args, deadline.budget_ms),
+                lambda: compute_recommendations(*args, deadline),
+                timeout=max(deadline.remaining(), 0) if deadline.expires_at else None
+            )
+        except NotEnoughProducts:
             return jsonify({
                 "success": False,
                 "error": "Nu sunt suficiente produse după aplicarea filtrelor!"
             }), 400
-        
-        # Verifică dacă produsul de referință este încă în DataFrame
-        if product_id not in df_filtered['product_id'].values:
-            df_filtered = pd.concat([
-                df_products[df_products['product_id'] == product_id],
-                df_filtered
-            ]).drop_duplicates()
-        
-        # Generează recomandări
-        recommendation_indices = get_n_recommandation(
-            df_filtered, 
-            "ingredients", 
-            "highlights", 
-            product_id, 
-            count
-        )
+        except (DeadlineExceeded, SingleFlightTimeout) as e:
+            # Așteptarea unui calcul comun care nu s-a terminat la timp degradează la fel
+            degraded_stage = e.args[0] if isinstance(e, DeadlineExceeded) else "coalesced_wait"
+            recommendation_counters.incr("degraded")
+            recommendation_counters.incr(f"degraded_{degraded_stage}")
+            recommendation_indices = popularity_fallback(
+                index,
+                index.position[product_id],
+                count,
+                user_skin_type,
+                user_allergies,
+                range_filters
+            )
         
         # Construiește răspunsul cu detalii despre produsele recomandate
         recommendations = []
         for idx in recommendation_indices:
-            product = df_filtered.iloc[idx]
-            recommendations.append({
+            product = df_products.iloc[idx]
+            recommendation = {
                 "product_id": product['product_id'],
                 "product_name": product['product_name'],
                 "brand_name": product['brand_name'],
@@ -842,10 +1737,11 @@ def get_recommendations():
                 "highlights": product['highlights'],
                 "primary_category": product['primary_category'],
                 "secondary_category": product['secondary_category']
-            })
+            }
+            recommendations.append({f: recommendation[f] for f in fields})
         
         # Obține informații despre produsul de referință
-        ref_product = df_products[df_products['product_id'] == product_id].iloc[0]
+        ref_product = df_products.iloc[index.position[product_id]]
         reference_product = {
             "product_id": ref_product['product_id'],
             "product_name": ref_product['product_name'],
@@ -858,11 +1754,25 @@ def get_recommendations():
             try:
                 conn = get_db_connection()
                 cur = conn.cursor()
+                recommended_ids = [r['product_id'] for r in recommendations]
                 cur.execute("""
                     INSERT INTO recommendation_history (user_id, product_id, recommended_products)
                     VALUES (%s, %s, %s)
-                """, (user_id, product_id, json.dumps([r['product_id'] for r in recommendations])))
+                    RETURNING id, created_at
+                """, (user_id, product_id, json.dumps(recommended_ids)))
+                event_id, created_at = cur.fetchone()
                 conn.commit()
+                # Contoarele de trend se actualizează incremental cu rândul scris
+                trending.record(event_id, product_id, recommended_ids, created_at.timestamp())
+                # Vectorul de gust: tranzacție separată, după ce rândul din istoric
+                # e salvat; la eroare profilul din cache (deja modificat) se aruncă
+                try:
+                    taste_store.record(cur, user_id, event_id)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    taste_store.invalidate(user_id)
+                    print(f"⚠️  Vectorul de gust nu a fost actualizat pentru user {user_id}: {e}")
                 cur.close()
                 conn.close()
             except:
@@ -885,8 +1795,13 @@ def get_recommendations():
             "filters_applied": {
                 "skin_type": user_skin_type if filter_skin_type else None,
                 "allergies": user_allergies if filter_allergies else [],
-                "keyword": filter_keyword if filter_keyword else None
-            }
+                "keyword": filter_keyword if filter_keyword else None,
+                **range_filters
+            },
+            "weights": weights,
+            "scorer": scorer,
+            "degraded": degraded_stage is not None,
+            "degraded_stage": degraded_stage
         })
         # return jsonify({"success": True, "recommendations": clean_for_json(recommendations)})
     except Exception as e:
@@ -896,33 +1811,93 @@ def get_recommendations():
         }), 500
 
 
+# Câmpurile produselor din recomandările Cold Start
+COLD_START_FIELDS = ("product_id", "product_name", "brand_name", "price", "rating", "reviews",
+                     "loves_count", "skin_type", "highlights", "primary_category")
+
+
 @app.route("/api/recommendations/for-user/<int:user_id>", methods=['GET'])
 def get_personalized_recommendations(user_id):
     """
     Generează recomandări personalizate bazate pe profilul utilizatorului.
     
-    Returnează produse populare potrivite pentru tipul de piele al utilizatorului.
+    Cu istoric: produsele cele mai apropiate de vectorul de gust al
+    utilizatorului (vezi taste.py), potrivite tipului de piele și fără
+    alergenii lui. Fără istoric: produse populare pentru profilul lui, din
+    lista calculată o singură dată per grup de profil (vezi cold_start.py).
     """
+    # Obține profilul utilizatorului (din cache dacă e posibil)
+    profile = get_user_profile(user_id)
+    
+    if not profile:
+        return jsonify({
+            "success": False,
+            "error": "Utilizator negăsit!"
+        }), 404
+    
+    user_skin_type, user_allergies = profile
+    
     conn = get_db_connection()
     cur = conn.cursor()
     
     try:
-        # Obține profilul utilizatorului
-        cur.execute(
-            "SELECT skin_type, allergies FROM users WHERE id = %s",
-            (user_id,)
-        )
-        user_data = cur.fetchone()
+        if catalog.ready:
+            from recommendations import COMBINED_FIELD
+            
+            index = get_product_index()
+            positions = None
+            try:
+                taste_profile = taste_store.get(cur, user_id)
+                conn.commit()
+                positions = recommend_for_taste(
+                    index,
+                    taste_profile,
+                    COMBINED_FIELD,
+                    cold_start.COLD_START_COUNT,
+                    cold_start.profile_mask(index, user_skin_type, user_allergies)
+                )
+            except psycopg2.Error as e:
+                conn.rollback()
+                print(f"⚠️  Vectorul de gust nu poate fi încărcat: {e}")
+            
+            if positions is not None and len(positions):
+                return jsonify({
+                    "success": True,
+                    "user_profile": {
+                        "skin_type": user_skin_type,
+                        "allergies_count": len(user_allergies)
+                    },
+                    "personalization": "history",
+                    "recommendations": clean_for_json(snapshot_products(index.snapshot, positions, COLD_START_FIELDS))
+                })
         
-        if not user_data:
-            return jsonify({
-                "success": False,
-                "error": "Utilizator negăsit!"
-            }), 404
+        group = None
+        try:
+            group = ensure_profile_group(cur, user_skin_type, user_allergies)
+            conn.commit()
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"⚠️  profile_recommendations indisponibil, calculăm direct: {e}")
+            if catalog.ready:
+                index = get_product_index()
+                positions = cold_start.recommend_for_profile(index, user_skin_type, user_allergies)
+                group = index, [str(pid) for pid in index.product_ids[positions]]
         
-        user_skin_type = user_data[0]
-        user_allergies = user_data[1] if user_data[1] else []
+        if group is not None:
+            index, product_ids = group
+            positions = [index.position[pid] for pid in product_ids if pid in index.position]
+            products = snapshot_products(index.snapshot, positions, COLD_START_FIELDS)
+            return jsonify({
+                "success": True,
+                "user_profile": {
+                    "skin_type": user_skin_type,
+                    "allergies_count": len(user_allergies)
+                },
+                "personalization": "profile",
+                "recommendations": clean_for_json(products)
+            })
         
+        # Catalogul in-memory nu e încă gata - query-ul SQL (fără filtrul de alergeni)
         # Query pentru produse potrivite
         query = """
             SELECT product_id, product_name, brand_name, price, 
@@ -977,34 +1952,205 @@ def get_personalized_recommendations(user_id):
 
 
 # ============================================================================
-# PORNIRE SERVER
+# COMPRESIE RĂSPUNSURI
 # ============================================================================
 
-if __name__ == "__main__":
-    print("🚀 Inițializare server...")
-    tables_existed = init_db()
+def negotiate_encoding(accept_encodings):
+    """Codarea preferată acceptată de client: br (dacă e instalat), gzip sau None."""
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda enc: accept_encodings.quality(enc))
+    return best if accept_encodings.quality(best) > 0 else None
+
+
+@app.after_request
+def compress_response(response):
+    """Comprimă răspunsurile mari (JSON / text) după Accept-Encoding."""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
     
-    if not tables_existed:
-        # Prima rulare - importăm produsele
-        import_csv("store_products.csv")
+    # Răspunsul depinde de Accept-Encoding, inclusiv când nu se comprimă
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    
+    if encoding == "br":
+        response.set_data(brotli.compress(data, quality=min(COMPRESS_LEVEL, 11)))
     else:
-        # Verifică dacă există produse
+        response.set_data(gzip.compress(data, compresslevel=min(COMPRESS_LEVEL, 9)))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+# ============================================================================
+# PORNIRE SERVER
+# ============================================================================
+
+def ensure_products_imported():
+    """Importă CSV-ul dacă tabela products e goală sau nu poate fi citită."""
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM products;")
+        product_count = cur.fetchone()[0]
+        cur.close()
+        conn.close()
+        
+        if product_count == 0:
+            print("⚠️  Tabela products e goală - importăm produsele...")
+            import_csv("store_products.csv")
+        else:
+            print(f"ℹ️  {product_count} produse găsite în baza de date")
+    except Exception as e:
+        print(f"⚠️  Eroare la verificare produse: {e}")
+        import_csv("store_products.csv")
+
+
+def rebuild_trending():
+    """Reconstruiește în fundal contoarele de trend din recommendation_history."""
+    def run():
         try:
             conn = get_db_connection()
-            cur = conn.cursor()
-            cur.execute("SELECT COUNT(*) FROM products;")
-            product_count = cur.fetchone()[0]
-            cur.close()
+        except Exception as e:
+            print(f"⚠️  Contoarele de trend pornesc goale (DB indisponibil): {e}")
+            return
+        try:
+            rows = trending.rebuild(conn, max_rows=TRENDING_MAX_SCAN_ROWS)
+            print(f"✅ Trend: {rows} rânduri din istoric în {trending.rebuild_seconds:.2f}s")
+        except Exception as e:
+            print(f"⚠️  Eroare la reconstruirea contoarelor de trend: {e}")
+        finally:
             conn.close()
-            
-            if product_count == 0:
-                print("⚠️  Tabela products e goală - importăm produsele...")
-                import_csv("store_products.csv")
-            else:
-                print(f"ℹ️  {product_count} produse găsite în baza de date")
+    
+    threading.Thread(target=run, name="trending-rebuild", daemon=True).start()
+
+
+def profile_origin():
+    """
+    Identificatorul acestui proces în notificările de profil. Include PID-ul:
+    workerii creați prin fork după import au același PROFILE_ORIGIN_TOKEN.
+    """
+    return f"{PROFILE_ORIGIN_TOKEN}:{os.getpid()}"
+
+
+def handle_profile_change(payload):
+    """
+    Un profil modificat de alt proces (NOTIFY pe PROFILE_CHANNEL): profilul
+    iese din cache și grupul Cold Start nou se precalculează.
+    
+    Notificările trimise de update_user din acest proces se ignoră: cache-ul
+    are deja profilul nou (write-through) și grupul a fost precalculat.
+    Returnează False pentru ele.
+    """
+    data = json.loads(payload)
+    if data.get('origin') == profile_origin():
+        return False
+    profile_cache.invalidate(data['user_id'])
+    if not catalog.ready:
+        return True
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        ensure_profile_group(cur, data.get('skin_type'), data.get('allergies') or [])
+        conn.commit()
+    finally:
+        cur.close()
+        conn.close()
+    return True
+
+
+def listen_profile_changes():
+    """
+    Pornește (o singură dată) thread-ul care ascultă PROFILE_CHANNEL.
+    
+    La fiecare (re)conectare cache-ul de profil se golește: notificările
+    trimise cât conexiunea a lipsit s-au pierdut.
+    """
+    global profile_listener
+    if profile_listener is not None:
+        return
+    
+    def run():
+        import select
+        while True:
+            conn = None
+            try:
+                conn = get_db_connection()
+                conn.autocommit = True
+                cur = conn.cursor()
+                cur.execute(f"LISTEN {PROFILE_CHANNEL};")
+                profile_cache.clear()
+                profile_listener_ready.set()
+                while True:
+                    if not select.select([conn], [], [], 30)[0]:
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            handle_profile_change(notify.payload)
+                        except Exception as e:
+                            print(f"⚠️  Notificare de profil netratată ({notify.payload}): {e}")
+            except Exception as e:
+                print(f"⚠️  Ascultarea {PROFILE_CHANNEL} s-a întrerupt: {e} - reîncercăm în 5s")
+            finally:
+                profile_listener_ready.clear()
+                if conn is not None:
+                    conn.close()
+            time.sleep(5)
+    
+    profile_listener = threading.Thread(target=run, name="profile-listener", daemon=True)
+    profile_listener.start()
+
+
+def warm_catalog():
+    """
+    Pornește în fundal importul inițial (dacă e nevoie) și construirea
+    catalogului in-memory; serverul răspunde între timp la endpoint-urile
+    care folosesc doar baza de date.
+    """
+    started = time.perf_counter()
+    
+    def before_build():
+        try:
+            ensure_products_imported()
         except Exception as e:
-            print(f"⚠️  Eroare la verificare produse: {e}")
-            import_csv("store_products.csv")
+            # catalogul se construiește oricum (din CSV dacă DB nu răspunde)
+            print(f"❌ Importul produselor a eșuat: {e}")
+        print(f"⏱️  Verificare / import produse: {time.perf_counter() - started:.2f}s")
+    
+    catalog.reload_async(before_build=before_build)
+
+
+if __name__ == "__main__":
+    # Cu reloader-ul din modul debug, procesul părinte doar urmărește
+    # fișierele; pornirea (DB + catalog) rulează numai în procesul care servește
+    if not DEBUG or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        print("🚀 Inițializare server...")
+        imports_done = time.perf_counter()
+        init_db()
+        db_done = time.perf_counter()
+        
+        # Importul inițial și catalogul in-memory (index + snapshot) se pregătesc
+        # în fundal; /api/recommendations răspunde 503 până sunt gata
+        warm_catalog()
+        rebuild_trending()
+        listen_profile_changes()
+        
+        # Watcher-ul nu șterge produse: cele lipsă din CSV devin fără stoc
+        sync_db = (lambda: import_csv(CATALOG_CSV, upsert=True, missing="out_of_stock")) \
+            if CATALOG_SOURCE == "db" else None
+        catalog.start_watcher(CATALOG_WATCH_INTERVAL, before_build=sync_db)
+        
+        print(f"⏱️  Pornire: importuri {imports_done - PROCESS_STARTED:.2f}s, "
+              f"init_db {db_done - imports_done:.2f}s, "
+              f"gata de cereri după {time.perf_counter() - PROCESS_STARTED:.2f}s")
     
     print("🌐 Serverul pornește pe http://localhost:5003")
-    app.run(host="0.0.0.0", port=5003, debug=True)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=5003, debug=DEBUG)
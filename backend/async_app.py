@@ -0,0 +1,297 @@
+"""
+=============================================================================
+VARIANTA ASINCRONĂ - Endpoint-urile de autentificare și profil
+=============================================================================
+/api/register, /api/login, /api/forgot-password și /api/user/<id> (GET, PUT)
+sunt doar I/O către baza de date. Aici rulează pe asyncio (Quart) cu un pool
+de conexiuni asyncpg: o cerere care așteaptă baza de date nu ține ocupat un
+worker, deci un singur proces poate ține mii de cereri concurente, iar
+conexiunile se refolosesc în loc să se deschidă una per cerere.
+
+Față de app.py:
+- login este o singură interogare: UPDATE ... SET last_login ... RETURNING
+  (în loc de SELECT + UPDATE);
+- register este un singur INSERT ... ON CONFLICT (email) DO NOTHING
+  (în loc de SELECT + INSERT, și fără cursa dintre ele).
+
+Răspunsurile sunt identice cu cele din app.py. Tabelele sunt create de
+app.py (init_db); recomandările rămân pe serverul Flask. Un PUT care
+schimbă skin_type / allergies trimite, în aceeași tranzacție, un NOTIFY pe
+canalul PROFILE_CHANNEL: serverul Flask îl ascultă, scoate profilul din
+cache și precalculează grupul Cold Start, la fel ca la propriul update_user.
+
+Dependențe (opționale, doar pentru acest server; nu sunt în requirements.txt):
+    pip install -r requirements-async.txt
+
+Rulare:
+    hypercorn async_app:app --bind 0.0.0.0:5004
+=============================================================================
+"""
+
+import asyncio
+import json
+import os
+
+import asyncpg
+from quart import Quart, request, jsonify
+from quart_cors import cors
+
+from auth import (
+    PROFILE_CHANNEL, PROFILE_FIELDS, RECOMMENDATION_PROFILE_FIELDS, USER_COLUMNS,
+    hash_password, profile_notification, user_payload
+)
+
+# ============================================================================
+# CONFIGURARE
+# ============================================================================
+
+app = Quart(__name__)
+app = cors(app, allow_origin="*")
+
+# Dimensiunea pool-ului de conexiuni; cererile peste ASYNC_DB_POOL_MAX
+# așteaptă o conexiune liberă cel mult ASYNC_DB_ACQUIRE_TIMEOUT secunde (apoi 503)
+ASYNC_DB_POOL_MIN = int(os.getenv("ASYNC_DB_POOL_MIN", "2"))
+ASYNC_DB_POOL_MAX = int(os.getenv("ASYNC_DB_POOL_MAX", "20"))
+ASYNC_DB_ACQUIRE_TIMEOUT = float(os.getenv("ASYNC_DB_ACQUIRE_TIMEOUT", "5"))
+ASYNC_PORT = int(os.getenv("ASYNC_PORT", "5004"))
+
+pool = None
+
+
+# ============================================================================
+# POOL DE CONEXIUNI
+# ============================================================================
+
+def database_dsn():
+    """Aceleași setări ca get_db_connection din app.py (DATABASE_URL sau DB_*)."""
+    database_url = os.environ.get('DATABASE_URL')
+    if database_url:
+        if database_url.startswith('postgres://'):
+            database_url = database_url.replace('postgres://', 'postgresql://', 1)
+        return {"dsn": database_url}
+    return {
+        "host": os.environ.get('DB_HOST', 'db'),
+        "database": os.environ.get('DB_NAME', 'glowup'),
+        "user": os.environ.get('DB_USER', 'glowup_user'),
+        "password": os.environ.get('DB_PASSWORD', 'glowup_password')
+    }
+
+
+async def init_connection(conn):
+    # JSONB (allergies) ca obiecte Python, la fel ca psycopg2
+    await conn.set_type_codec("jsonb", encoder=json.dumps, decoder=json.loads, schema="pg_catalog")
+
+
+@app.before_serving
+async def open_pool():
+    global pool
+    pool = await asyncpg.create_pool(min_size=ASYNC_DB_POOL_MIN, max_size=ASYNC_DB_POOL_MAX,
+                                     init=init_connection, **database_dsn())
+    print(f"✅ Pool asyncpg deschis ({ASYNC_DB_POOL_MIN}-{ASYNC_DB_POOL_MAX} conexiuni)")
+
+
+@app.after_serving
+async def close_pool():
+    if pool is not None:
+        await pool.close()
+
+
+def acquire():
+    """O conexiune din pool, cu limită de așteptare."""
+    return pool.acquire(timeout=ASYNC_DB_ACQUIRE_TIMEOUT)
+
+
+@app.errorhandler(asyncio.TimeoutError)
+async def pool_exhausted(e):
+    return jsonify({
+        "success": False,
+        "error": "Serverul este ocupat. Te rugăm să încerci din nou."
+    }), 503, {"Retry-After": "1"}
+
+
+# ============================================================================
+# ENDPOINT-URI API - AUTENTIFICARE
+# ============================================================================
+
+@app.route("/api/register", methods=['POST'])
+async def register():
+    """Înregistrează un utilizator nou cu date Cold Start (același body ca în app.py)."""
+    data = await request.get_json()
+
+    if not data.get('email') or not data.get('password') or not data.get('name'):
+        return jsonify({
+            "success": False,
+            "error": "Email, parola și numele sunt obligatorii!"
+        }), 400
+
+    try:
+        async with acquire() as conn:
+            # ON CONFLICT: email existent -> niciun rând returnat
+            user_id = await conn.fetchval("""
+                INSERT INTO users (email, password_hash, name, gender, age_range, skin_type, allergies)
+                VALUES ($1, $2, $3, $4, $5, $6, $7)
+                ON CONFLICT (email) DO NOTHING
+                RETURNING id
+            """, data['email'], hash_password(data['password']), data['name'],
+                data.get('gender'), data.get('age_range'), data.get('skin_type'),
+                data.get('allergies', []))
+    except asyncpg.PostgresError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+    if user_id is None:
+        return jsonify({
+            "success": False,
+            "error": "Email-ul este deja înregistrat!"
+        }), 400
+
+    print(f"✅ Utilizator nou creat (Cold Start): {data['email']}")
+    return jsonify({
+        "success": True,
+        "message": "Cont creat cu succes! Profilul Cold Start a fost salvat.",
+        "user_id": user_id
+    }), 201
+
+
+@app.route("/api/forgot-password", methods=['POST'])
+async def forgot_password():
+    """Inițiază resetarea parolei (simulat, ca în app.py)."""
+    data = await request.get_json()
+    email = data.get('email', '').strip()
+
+    if not email:
+        return jsonify({
+            "success": False,
+            "error": "Adresa de email este obligatorie!"
+        }), 400
+
+    try:
+        async with acquire() as conn:
+            exists = await conn.fetchval("SELECT 1 FROM users WHERE email = $1", email)
+    except asyncpg.PostgresError:
+        return jsonify({
+            "success": False,
+            "error": "A apărut o eroare. Te rugăm să încerci din nou."
+        }), 500
+
+    if exists:
+        print(f"📧 Cerere resetare parolă pentru: {email}")
+
+    # Întotdeauna returnăm succes (pentru a nu dezvălui dacă email-ul există)
+    return jsonify({
+        "success": True,
+        "message": "Dacă există un cont cu această adresă, vei primi un email cu instrucțiuni."
+    }), 200
+
+
+@app.route("/api/login", methods=['POST'])
+async def login():
+    """Autentifică un utilizator; last_login se actualizează în aceeași interogare."""
+    data = await request.get_json()
+
+    if not data.get('email') or not data.get('password'):
+        return jsonify({
+            "success": False,
+            "error": "Email și parola sunt obligatorii!"
+        }), 400
+
+    try:
+        async with acquire() as conn:
+            user = await conn.fetchrow(f"""
+                UPDATE users SET last_login = NOW()
+                WHERE email = $1 AND password_hash = $2
+                RETURNING {USER_COLUMNS}
+            """, data['email'], hash_password(data['password']))
+    except asyncpg.PostgresError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+    if user is None:
+        return jsonify({
+            "success": False,
+            "error": "Email sau parolă incorectă!"
+        }), 401
+
+    return jsonify({
+        "success": True,
+        "message": "Login reușit!",
+        "user": user_payload(user)
+    }), 200
+
+
+@app.route("/api/user/<int:user_id>", methods=['GET'])
+async def get_user(user_id):
+    """Returnează datele unui utilizator după ID (inclusiv Cold Start)."""
+    async with acquire() as conn:
+        user = await conn.fetchrow(f"SELECT {USER_COLUMNS} FROM users WHERE id = $1", user_id)
+
+    if user is None:
+        return jsonify({
+            "success": False,
+            "error": "Utilizator negăsit!"
+        }), 404
+
+    return jsonify({
+        "success": True,
+        "user": user_payload(user)
+    }), 200
+
+
+@app.route("/api/user/<int:user_id>", methods=['PUT'])
+async def update_user(user_id):
+    """Actualizează profilul Cold Start al unui utilizator."""
+    data = await request.get_json()
+
+    # Query dinamic doar cu câmpurile primite ($1.. valorile, ultimul parametru id-ul)
+    fields = [field for field in PROFILE_FIELDS if field in data]
+    if not fields:
+        return jsonify({
+            "success": False,
+            "error": "Niciun câmp de actualizat!"
+        }), 400
+
+    assignments = ", ".join(f"{field} = ${i}" for i, field in enumerate(fields, start=1))
+    query = f"UPDATE users SET {assignments} WHERE id = ${len(fields) + 1} RETURNING skin_type, allergies"
+
+    try:
+        async with acquire() as conn:
+            async with conn.transaction():
+                updated = await conn.fetchrow(query, *[data[field] for field in fields], user_id)
+                # NOTIFY se livrează la commit: ascultătorii nu văd profilul înaintea datelor
+                if updated is not None and any(f in fields for f in RECOMMENDATION_PROFILE_FIELDS):
+                    await conn.execute("SELECT pg_notify($1, $2)", PROFILE_CHANNEL,
+                                       profile_notification(user_id, updated['skin_type'], updated['allergies']))
+    except asyncpg.PostgresError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+    print(f"✅ Profil Cold Start actualizat pentru user {user_id}")
+    return jsonify({
+        "success": True,
+        "message": "Profil Cold Start actualizat cu succes!"
+    }), 200
+
+
+@app.route("/api/health")
+async def health():
+    return jsonify({
+        "status": "ok",
+        "pool_size": pool.get_size() if pool else 0,
+        "pool_idle": pool.get_idle_size() if pool else 0
+    })
+
+
+# ============================================================================
+# PORNIRE SERVER
+# ============================================================================
+
+if __name__ == "__main__":
+    # Pentru producție: hypercorn async_app:app --bind 0.0.0.0:5004
+    print(f"🌐 Serverul asincron pornește pe http://localhost:{ASYNC_PORT}")
+    app.run(host="0.0.0.0", port=ASYNC_PORT)
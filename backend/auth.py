@@ -0,0 +1,55 @@
+"""
+Funcții de autentificare comune serverului Flask (app.py) și variantei
+asincrone (async_app.py), ca ambele să scrie și să citească aceleași date.
+"""
+
+import hashlib
+import json
+
+# Coloanele returnate la login și la GET /api/user/<id>, în ordinea din user_payload
+USER_COLUMNS = "id, email, name, gender, age_range, skin_type, allergies"
+
+# Câmpurile de profil (Cold Start) care pot fi actualizate
+PROFILE_FIELDS = ("name", "gender", "age_range", "skin_type", "allergies")
+# Câmpurile din care se fac recomandările (cache-ul de profil al serverului Flask)
+RECOMMENDATION_PROFILE_FIELDS = ("skin_type", "allergies")
+
+# Canalul Postgres (LISTEN / NOTIFY) pe care se anunță profilurile de
+# recomandare modificate; orice proces care le ține în cache îl ascultă
+PROFILE_CHANNEL = "profile_changed"
+
+
+def hash_password(password):
+    """
+    Criptează parola folosind SHA-256.
+
+    În producție, folosește bcrypt sau argon2 pentru securitate mai bună!
+    SHA-256 este folosit aici pentru simplitate.
+    """
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def user_payload(row):
+    """Datele publice ale unui utilizator dintr-un rând cu USER_COLUMNS."""
+    return {
+        "id": row[0],
+        "email": row[1],
+        "name": row[2],
+        "gender": row[3],
+        "age_range": row[4],  # Interval vârstă Cold Start
+        "skin_type": row[5],
+        "allergies": row[6] if row[6] else []
+    }
+
+
+def profile_notification(user_id, skin_type, allergies, origin=None):
+    """
+    Payload-ul NOTIFY pentru un profil modificat (se trimite în tranzacția UPDATE-ului).
+
+    origin: identificatorul procesului care trimite, ca el să-și poată ignora
+    propriile notificări (și-a actualizat deja cache-ul).
+    """
+    payload = {"user_id": user_id, "skin_type": skin_type, "allergies": allergies or []}
+    if origin is not None:
+        payload["origin"] = origin
+    return json.dumps(payload)
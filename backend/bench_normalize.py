@@ -0,0 +1,71 @@
+"""
+Benchmark pentru normalizarea textului la construirea indexului.
+
+Compară calea veche (normalize_text aplicat rând cu rând de trei ori:
+pe cele două coloane și apoi pe final_description) cu normalize_columns
+(operații vectorizate pandas, fiecare câmp normalizat o singură dată,
+opțional împărțit pe bucăți într-un pool de procese).
+
+Rulare:
+    python bench_normalize.py --rows 500000 --jobs 4
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from recommendations import normalize_text, normalize_columns
+
+
+def load_enlarged(filename, rows):
+    """Încarcă CSV-ul și îl repetă până ajunge la numărul cerut de rânduri."""
+    df = pd.read_csv(filename, dtype=str, usecols=["highlights", "ingredients"])
+    reps = max(1, -(-rows // len(df)))
+    return pd.concat([df] * reps, ignore_index=True).iloc[:rows]
+
+
+def old_path(df, col1, col2):
+    h = df[col1].apply(normalize_text)
+    i = df[col2].apply(normalize_text)
+    return (h.fillna('') + " " + i.fillna('')).str.strip().apply(normalize_text)
+
+
+def new_path(df, col1, col2, n_jobs):
+    normalized = normalize_columns(df, [col1, col2], n_jobs=n_jobs)
+    return (normalized[col1] + " " + normalized[col2]).str.strip()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="store_products.csv")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--jobs", type=int, default=4)
+    args = parser.parse_args()
+
+    df = load_enlarged(args.csv, args.rows)
+    print(f"📦 {len(df)} rânduri")
+
+    old, t_old = timed(old_path, df, "highlights", "ingredients")
+    print(f"apply (vechi):        {len(df) / t_old:12,.0f} rânduri/s  ({t_old:.2f}s)")
+
+    new, t_new = timed(new_path, df, "highlights", "ingredients", 1)
+    print(f"vectorizat:           {len(df) / t_new:12,.0f} rânduri/s  ({t_new:.2f}s)")
+
+    if args.jobs > 1:
+        par, t_par = timed(new_path, df, "highlights", "ingredients", args.jobs)
+        print(f"vectorizat x{args.jobs} procese: {len(df) / t_par:12,.0f} rânduri/s  ({t_par:.2f}s)")
+        assert par.equals(new)
+
+    mismatches = int((old != new).sum())
+    print(f"Diferențe față de calea veche: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
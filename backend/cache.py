@@ -0,0 +1,190 @@
+"""
+Cache-uri in-process folosite de backend.
+
+TTLCache: dicționar cu limită de mărime (LRU) și expirare (TTL),
+sigur pentru mai multe thread-uri, cu contoare de hit/miss și o generație
+per cheie (o valoare citită înaintea unei scrieri nu o mai poate suprascrie).
+SingleFlight: cererile identice simultane așteaptă un singur calcul în
+curs și îi primesc rezultatul (nu se păstrează nimic după terminare).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Cache LRU cu expirare, cu statistici de hit-rate."""
+
+    def __init__(self, maxsize=10000, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # cheie -> (expira_la, valoare)
+        self._lock = threading.Lock()
+        # cheie -> momentul (_clock) ultimei scrieri / invalidări; cheile ieșite
+        # din evidență au generația _floor (cel puțin cât ultima lor scriere)
+        self._generations = OrderedDict()
+        self._clock = 0
+        self._floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Returnează valoarea din cache sau default dacă lipsește/a expirat."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _bump(self, key):
+        """Marchează o scriere pe cheie (apelat sub _lock)."""
+        self._clock += 1
+        self._generations[key] = self._clock
+        self._generations.move_to_end(key)
+        while len(self._generations) > self.maxsize:
+            _, generation = self._generations.popitem(last=False)
+            self._floor = max(self._floor, generation)
+
+    def generation(self, key):
+        """Generația curentă a cheii; se citește înainte de a încărca valoarea din sursă."""
+        with self._lock:
+            return self._generations.get(key, self._floor)
+
+    def set(self, key, value, generation=None):
+        """
+        Adaugă/înlocuiește o valoare; elimină cea mai veche intrare dacă e plin.
+
+        Cu generation (din generation() citit înainte de încărcare), valoarea
+        se pune doar dacă între timp nu a existat alt set/invalidate pe cheie.
+        Returnează True dacă valoarea a fost pusă în cache.
+        """
+        with self._lock:
+            if generation is not None and self._generations.get(key, self._floor) != generation:
+                return False
+            self._bump(key)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, key):
+        """Scoate o intrare din cache (dacă există)."""
+        with self._lock:
+            self._bump(key)
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Golește cache-ul; nicio generație citită înainte nu mai e valabilă."""
+        with self._lock:
+            self._data.clear()
+            self._generations.clear()
+            self._clock += 1
+            self._floor = self._clock
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Statistici pentru endpoint-ul de metrici."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else None
+            }
+
+
+class SingleFlightTimeout(Exception):
+    """Calculul la care s-a atașat cererea nu s-a terminat în timpul alocat."""
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalescing pentru calcule identice concurente.
+
+    Primul apel pentru o cheie execută funcția; apelurile cu aceeași cheie
+    sosite până la terminarea ei așteaptă și primesc același rezultat sau
+    aceeași excepție. După terminare cheia se șterge, deci un apel ulterior
+    calculează din nou (nu se servesc date vechi).
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def do(self, key, fn, timeout=None):
+        """
+        Rezultatul lui fn() pentru cheia dată, calculat o singură dată per rafală.
+
+        timeout (secunde) se aplică doar apelurilor care așteaptă calculul
+        altuia; la depășire ridică SingleFlightTimeout.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                flight.result = fn()
+                return flight.result
+            except Exception as e:
+                flight.error = e
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+
+        if not flight.done.wait(timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise SingleFlightTimeout(key)
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def stats(self):
+        """Statistici pentru endpoint-ul de metrici."""
+        with self._lock:
+            total = self.executed + self.coalesced
+            return {
+                "in_flight": len(self._flights),
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "coalesced_rate": round(self.coalesced / total, 4) if total else None
+            }
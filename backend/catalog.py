@@ -0,0 +1,181 @@
+"""
+Catalogul activ (indexul de recomandări) cu reîncărcare fără downtime.
+
+CatalogManager ține o referință la versiunea activă. O reîncărcare
+construiește noua versiune într-un thread de fundal, apoi o schimbă
+atomic cu cea veche (double buffering). Cererile în curs au deja
+referința la versiunea veche și termină pe ea. Opțional, un thread
+urmărește fișierul sursă și pornește reîncărcarea când acesta se schimbă
+(după ce data și mărimea lui nu se mai schimbă între două verificări).
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+
+class CatalogVersion:
+    """O versiune construită a catalogului, împreună cu datele despre build."""
+
+    def __init__(self, number, index, build_seconds, source_mtime):
+        self.number = number
+        self.index = index
+        self.build_seconds = build_seconds
+        self.source_mtime = source_mtime
+        self.built_at = datetime.now()
+
+    def info(self):
+        return {
+            "version": self.number,
+            "products": len(self.index),
+            "build_seconds": round(self.build_seconds, 3),
+            "built_at": self.built_at.isoformat(timespec="seconds"),
+            "source_mtime": datetime.fromtimestamp(self.source_mtime).isoformat(timespec="seconds")
+                            if self.source_mtime else None
+        }
+
+
+class CatalogManager:
+    """
+    Versiunea activă a catalogului + reîncărcări în fundal.
+
+    builder() construiește și returnează un index nou; source_path este
+    fișierul urmărit de watcher (și a cărui dată de modificare se reține);
+    on_activate(version) opțional e apelat după fiecare versiune activată.
+    """
+
+    def __init__(self, builder, source_path=None, on_activate=None):
+        self.builder = builder
+        self.source_path = source_path
+        self.on_activate = on_activate
+        self._active = None
+        self._build_lock = threading.Lock()
+        self._building = False
+        self._next_number = 1
+        self.last_error = None
+        self._watcher = None
+
+    def _source_mtime(self):
+        if self.source_path and os.path.exists(self.source_path):
+            return os.path.getmtime(self.source_path)
+        return None
+
+    def _source_state(self):
+        """(mtime, mărime) fișierului sursă, sau None dacă lipsește."""
+        try:
+            stat = os.stat(self.source_path)
+        except (OSError, TypeError):
+            return None
+        return stat.st_mtime, stat.st_size
+
+    def _build(self):
+        """Construiește o versiune nouă și o face activă (apelat sub _build_lock)."""
+        mtime = self._source_mtime()
+        started = time.perf_counter()
+        index = self.builder()
+        version = CatalogVersion(self._next_number, index, time.perf_counter() - started, mtime)
+        self._next_number += 1
+        # schimbarea referinței este atomică: cererile noi văd versiunea nouă,
+        # cele în curs termină pe cea veche
+        self._active = version
+        self.last_error = None
+        print(f"✅ Catalog v{version.number} activ ({len(index)} produse, {version.build_seconds:.2f}s)")
+        if self.on_activate:
+            try:
+                self.on_activate(version)
+            except Exception as e:
+                print(f"⚠️  on_activate a eșuat pentru catalog v{version.number}: {e}")
+        return version
+
+    @property
+    def active(self):
+        """Versiunea activă; o construiește sincron la prima folosire."""
+        version = self._active
+        if version is None:
+            with self._build_lock:
+                version = self._active or self._build()
+        return version
+
+    def get(self):
+        """Indexul versiunii active."""
+        return self.active.index
+
+    @property
+    def ready(self):
+        return self._active is not None
+
+    @property
+    def building(self):
+        return self._building
+
+    def reload_async(self, before_build=None):
+        """
+        Pornește o reîncărcare în fundal.
+
+        before_build() opțional rulează în același thread înainte de build
+        (ex. sincronizarea CSV -> DB). Returnează False dacă o reîncărcare
+        e deja în curs.
+        """
+        if not self._build_lock.acquire(blocking=False):
+            return False
+        self._building = True
+
+        def run():
+            try:
+                if before_build:
+                    before_build()
+                self._build()
+            except Exception as e:
+                # versiunea veche rămâne activă
+                self.last_error = str(e)
+                print(f"❌ Reîncărcarea catalogului a eșuat: {e}")
+            finally:
+                self._building = False
+                self._build_lock.release()
+
+        threading.Thread(target=run, name="catalog-reload", daemon=True).start()
+        return True
+
+    def start_watcher(self, interval, before_build=None):
+        """
+        Verifică periodic fișierul sursă și reîncarcă la schimbare.
+
+        Un fișier încă în curs de scriere nu se citește: reîncărcarea
+        pornește abia când data și mărimea sunt aceleași la două verificări
+        consecutive. before_build are același rol ca la reload_async.
+        """
+        if not self.source_path or interval <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            last_mtime = None
+            previous = None
+            while True:
+                time.sleep(interval)
+                version = self._active
+                if version is None:
+                    continue
+                if last_mtime is None:
+                    last_mtime = version.source_mtime
+                state = self._source_state()
+                changed = state is not None and state[0] != last_mtime
+                # schimbat, dar diferit de verificarea anterioară: încă se scrie
+                stable = changed and state == previous
+                previous = state
+                # fiecare modificare declanșează o singură reîncărcare,
+                # chiar dacă aceasta eșuează
+                if stable and self.reload_async(before_build):
+                    print(f"🔄 {self.source_path} s-a modificat - reîncărcăm catalogul...")
+                    last_mtime = state[0]
+
+        self._watcher = threading.Thread(target=watch, name="catalog-watcher", daemon=True)
+        self._watcher.start()
+
+    def status(self):
+        version = self._active
+        return {
+            "active": version.info() if version else None,
+            "building": self._building,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,172 @@
+"""
+Recomandări Cold Start precalculate pe grupuri de profil.
+
+Utilizatorii noi sunt descriși doar de datele Cold Start, așa că mulți au
+profiluri identice. Recomandările depind doar de tipul de piele și de
+alergeni (gen și vârstă nu intră în scor), deci utilizatorii se grupează
+după acestea, normalizate, și se calculează o singură listă per grup, cu
+măștile vectorizate ale indexului. Rezultatele stau în tabela
+profile_recommendations, etichetate cu amprenta catalogului; după o
+schimbare de catalog sau de profil se recalculează doar grupurile afectate.
+
+Rulare (toate grupurile din tabela users):
+    python cold_start.py
+"""
+
+import hashlib
+import json
+from datetime import datetime
+
+# Câte produse se păstrează pentru fiecare grup
+COLD_START_COUNT = 20
+
+
+def normalize_profile(skin_type, allergies):
+    """(skin_type, alergeni) în formă canonică: lowercase, fără duplicate, sortați."""
+    skin_type = (skin_type or "").strip().lower()
+    allergies = sorted({str(a).strip().lower() for a in (allergies or []) if str(a).strip()})
+    return skin_type, allergies
+
+
+def profile_key(skin_type, allergies):
+    """Cheia grupului pentru un profil (hash al formei canonice)."""
+    skin_type, allergies = normalize_profile(skin_type, allergies)
+    raw = json.dumps([skin_type, allergies], separators=(",", ":"))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def catalog_fingerprint(index):
+    """
+    Amprenta datelor din catalog care influențează recomandările Cold Start:
+    coloanele de filtrare / ordonare și ingredientele (alergenii se exclud
+    prin ele). Ingredientele intră ca matrice + vocabular, nu ca text: în
+    modul lean coloana brută nu mai există.
+    """
+    import numpy as np
+    import pandas as pd
+
+    columns = [c for c in ("product_id", "loves_count", "rating", "out_of_stock", "assigned_skin_type")
+               if c in index.df]
+    digest = hashlib.sha1(pd.util.hash_pandas_object(index.df[columns].astype(object), index=False).to_numpy())
+    if index.ingredient_matrix is not None:
+        matrix = index.ingredient_matrix
+        digest.update(matrix.indptr.astype(np.int64).tobytes())
+        digest.update(matrix.indices.astype(np.int32).tobytes())
+        digest.update(pd.util.hash_pandas_object(index.ingredient_names, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def profile_mask(index, skin_type, allergies):
+    """
+    Produsele în stoc potrivite unui profil.
+
+    Tipul de piele păstrează semantica veche: valoarea care conține tipul
+    utilizatorului, "all" sau necompletată. Alergenii se exclud prin
+    vocabularul de ingrediente.
+    """
+    snapshot = index.snapshot
+    skin_type, allergies = normalize_profile(skin_type, allergies)
+    mask = snapshot.in_stock.copy()
+    if skin_type:
+        n = len(index)
+        mask &= (snapshot.substring_mask(n, index.skin_type_postings, skin_type) |
+                 snapshot.substring_mask(n, index.skin_type_postings, "all") |
+                 index.skin_type_mask(""))
+    if allergies:
+        mask &= index.allergen_free_mask(allergies)
+    return mask
+
+
+def recommend_for_profile(index, skin_type, allergies, count=COLD_START_COUNT):
+    """Produsele populare (în stoc) pentru un profil, ca poziții în catalog."""
+    mask = profile_mask(index, skin_type, allergies)
+    # loves_count DESC, rating DESC - ordinea precalculată din snapshot
+    order = index.snapshot.sort_orders["loves_count"]
+    return order[mask[order]][:count]
+
+
+def ensure_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS profile_recommendations (
+            profile_key VARCHAR(40) PRIMARY KEY,
+            skin_type TEXT,
+            allergies JSONB DEFAULT '[]'::jsonb,
+            recommended_products JSONB NOT NULL,
+            catalog_version VARCHAR(16) NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+
+def store_group(cur, index, fingerprint, skin_type, allergies):
+    """Calculează și salvează lista unui grup; returnează lista de product_id."""
+    skin_type, allergies = normalize_profile(skin_type, allergies)
+    positions = recommend_for_profile(index, skin_type, allergies)
+    product_ids = [str(pid) for pid in index.product_ids[positions]]
+    cur.execute("""
+        INSERT INTO profile_recommendations
+            (profile_key, skin_type, allergies, recommended_products, catalog_version, computed_at)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (profile_key) DO UPDATE SET
+            recommended_products = EXCLUDED.recommended_products,
+            catalog_version = EXCLUDED.catalog_version,
+            computed_at = EXCLUDED.computed_at
+    """, (profile_key(skin_type, allergies), skin_type, json.dumps(allergies),
+          json.dumps(product_ids), fingerprint, datetime.now()))
+    return product_ids
+
+
+def lookup_group(cur, fingerprint, skin_type, allergies):
+    """Lista precalculată a grupului, sau None dacă lipsește / e pentru alt catalog."""
+    cur.execute(
+        "SELECT recommended_products FROM profile_recommendations WHERE profile_key = %s AND catalog_version = %s",
+        (profile_key(skin_type, allergies), fingerprint)
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def precompute_groups(conn, index, fingerprint=None):
+    """
+    Recalculează grupurile de profil care lipsesc sau sunt pentru alt catalog.
+
+    Returnează (grupuri distincte, grupuri recalculate).
+    """
+    fingerprint = fingerprint or catalog_fingerprint(index)
+    cur = conn.cursor()
+    try:
+        ensure_table(cur)
+        cur.execute("SELECT DISTINCT skin_type, allergies FROM users")
+        groups = {}
+        for skin_type, allergies in cur.fetchall():
+            normalized = normalize_profile(skin_type, allergies)
+            groups[profile_key(*normalized)] = normalized
+
+        cur.execute("SELECT profile_key FROM profile_recommendations WHERE catalog_version = %s", (fingerprint,))
+        fresh = {row[0] for row in cur.fetchall()}
+
+        stale = [profile for key, profile in groups.items() if key not in fresh]
+        for skin_type, allergies in stale:
+            store_group(cur, index, fingerprint, skin_type, allergies)
+        conn.commit()
+        return len(groups), len(stale)
+    finally:
+        cur.close()
+
+
+def main():
+    import time
+    from app import get_db_connection, get_product_index
+
+    started = time.perf_counter()
+    index = get_product_index()
+    conn = get_db_connection()
+    try:
+        total, computed = precompute_groups(conn, index)
+    finally:
+        conn.close()
+    print(f"✅ {total} grupuri de profil, {computed} recalculate în {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Evaluare offline calitate vs. latență pentru modurile de recomandare.
+
+Referința este implementarea inițială, reconstruită aici independent de
+ProductIndex: normalize_text pe fiecare valoare, final_description
+(highlights + ingredients), eliminarea duplicatelor și a textelor goale,
+TfidfVectorizer pe tot catalogul rămas și cosine_similarity. Clasamentul
+ei se traduce în product_id-uri; fiecare mod este comparat cu ea, tot
+după product_id, prin recall@N (cât din top-N de referință regăsește) și
+prin procentul de liste identice (aceleași produse, aceeași ordine), plus
+latența per interogare (p50 / p95 / p99), timpul de build și memoria
+indexului. Diferențele de normalizare, de mască (valid / duplicate) sau
+de fit apar ca recall sub 1.
+
+Moduri:
+    get_n_recommandation  funcția publică (reconstruiește indexul la fiecare apel)
+    exact                 ProductIndex, float64
+    lean                  ProductIndex lean (float32, indici int32)
+    weighted              blocuri pe câmpuri cu ponderi (--weights)
+    jaccard, overlap      mulțimile de ingrediente
+    neighbors             tabela precalculată top-K (neighbors.py)
+
+Cataloagele mărite (--sizes 1 4 ...) repetă CSV-ul cu id-uri noi și texte
+perturbate (o parte din elementele listelor eliminate, restul amestecate),
+ca să nu apară duplicate exacte. Totul e determinist pentru același --seed.
+
+Rulare:
+    python evaluate.py --sizes 1 4 --queries 200 --n 10 [--json rezultate.json]
+"""
+
+import argparse
+import json
+import re
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from recommendations import (
+    ProductIndex, COMBINED_FIELD, apply_catalog_dtypes, get_n_recommandation, load_catalog
+)
+from neighbors import compute_neighbors
+
+MODES = ("get_n_recommandation", "exact", "lean", "weighted", "jaccard", "overlap", "neighbors")
+DEFAULT_WEIGHTS = {"highlights": 0.5, "ingredients": 0.5}
+
+
+def _perturb(text, rng, drop):
+    """Elimină o fracțiune din elementele listei (separate prin virgulă) și le amestecă."""
+    if not isinstance(text, str) or not text:
+        return text
+    items = text.split(",")
+    kept = [item for item in items if rng.random() >= drop] or items[:1]
+    rng.shuffle(kept)
+    return ",".join(kept)
+
+
+def enlarge(df, factor, seed, drop=0.2):
+    """Catalogul repetat de factor ori; copiile au id-uri noi și texte perturbate."""
+    if factor <= 1:
+        return df.reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    copies = [df]
+    for k in range(1, factor):
+        copy = df.copy()
+        copy["product_id"] = copy["product_id"].astype(str) + f"-{k}"
+        for column in ("highlights", "ingredients"):
+            copy[column] = [_perturb(text, rng, drop) for text in copy[column]]
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def _baseline_normalize(text):
+    # copia lui normalize_text din implementarea inițială (nu cea din recommendations)
+    if pd.isna(text):
+        return ""
+    text = re.sub(r'<.*?>', '', str(text))
+    text = text.encode("ascii", "ignore").decode()
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip().lower()
+
+
+class BaselineReference:
+    """
+    Clasamentul implementării inițiale, pe product_id: aceleași etape ca
+    vechiul get_n_recommandation, dar similaritățile se calculează doar
+    pentru rândul interogat (aceleași valori, fără matricea n x n).
+    """
+
+    def __init__(self, df, col1="highlights", col2="ingredients"):
+        df_exp = df[["product_id", col1, col2]].copy()
+        df_exp[col1] = df_exp[col1].apply(_baseline_normalize)
+        df_exp[col2] = df_exp[col2].apply(_baseline_normalize)
+        df_exp["final_description"] = (df_exp[col1].fillna('') + " " + df_exp[col2].fillna('')).str.strip()
+        df_exp["final_description"] = df_exp["final_description"].apply(_baseline_normalize)
+        df_exp = df_exp.drop_duplicates(subset=["final_description"])
+        df_exp = df_exp.reset_index(drop=True)
+        df_exp = df_exp[df_exp["final_description"].str.strip() != ""]
+        df_exp = df_exp.drop_duplicates(subset=["final_description"]).reset_index(drop=True)
+
+        self.product_ids = df_exp["product_id"].to_numpy()
+        self.position = {}
+        for i, pid in enumerate(self.product_ids):
+            self.position.setdefault(pid, i)
+        self.matrix = TfidfVectorizer(stop_words='english').fit_transform(df_exp["final_description"])
+
+    def recommend(self, product_id, N):
+        """product_id-urile celor mai similare N produse (ordinea din implementarea inițială)."""
+        ref = self.position[product_id]
+        similarities = cosine_similarity(self.matrix[ref], self.matrix).ravel()
+        similarities[ref] = -1
+        top = np.argsort(similarities)[::-1][:N]
+        return list(self.product_ids[top])
+
+
+def percentiles(samples):
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000, [50, 95, 99])
+    return {"p50_ms": round(p50, 3), "p95_ms": round(p95, 3), "p99_ms": round(p99, 3)}
+
+
+def index_memory(index):
+    return sum(index.memory_report().values())
+
+
+def build_mode(mode, df, args):
+    """(funcție product_id -> poziții în df, memorie în bytes) pentru un mod."""
+    n = args.n
+    if mode == "get_n_recommandation":
+        return (lambda pid: get_n_recommandation(df, id=pid, N=n)), None
+
+    if mode in ("exact", "weighted"):
+        index = ProductIndex(df)
+        weights = args.weights if mode == "weighted" else None
+        return (lambda pid: index.recommend(pid, n, weights=weights)), index_memory(index)
+
+    if mode == "lean":
+        index = ProductIndex(apply_catalog_dtypes(df), lean=True)
+        return (lambda pid: index.recommend(pid, n)), index_memory(index)
+
+    if mode in ("jaccard", "overlap"):
+        index = ProductIndex(df, text=False)
+        return (lambda pid: index.recommend(pid, n, scorer=mode)), index_memory(index)
+
+    if mode == "neighbors":
+        index = ProductIndex(apply_catalog_dtypes(df), lean=True)
+        indices, scores = compute_neighbors(index.block(COMBINED_FIELD), index.valid,
+                                            k=max(args.k, n), n_jobs=args.jobs)
+
+        def lookup(pid):
+            row = indices[index.position[pid]]
+            return row[row >= 0][:n]
+        return lookup, index_memory(index) + indices.nbytes + scores.nbytes
+
+    raise ValueError(f"Mod necunoscut: {mode}")
+
+
+def evaluate(df, modes, args, label):
+    """Rezultatele tuturor modurilor pe un catalog."""
+    reference_model = BaselineReference(df)
+    rng = np.random.default_rng(args.seed)
+    candidates = reference_model.product_ids
+    queries = rng.choice(candidates, size=min(args.queries, len(candidates)), replace=False)
+    reference = {pid: reference_model.recommend(pid, args.n) for pid in queries}
+    del reference_model
+    # modurile returnează poziții în df; comparația se face pe product_id
+    product_ids = df["product_id"].to_numpy()
+
+    results = []
+    for mode in modes:
+        started = time.perf_counter()
+        recommend, memory = build_mode(mode, df, args)
+        build_seconds = time.perf_counter() - started
+
+        # funcția originală reconstruiește indexul la fiecare apel: doar câteva interogări
+        mode_queries = queries[:args.legacy_queries] if mode == "get_n_recommandation" else queries
+
+        latencies, recalls, identical = [], [], 0
+        for pid in mode_queries:
+            started = time.perf_counter()
+            positions = recommend(pid)
+            latencies.append(time.perf_counter() - started)
+
+            found = list(product_ids[np.asarray(positions, dtype=int)])
+            expected = reference[pid]
+            if expected:
+                recalls.append(len(set(found) & set(expected)) / len(expected))
+            identical += found == expected
+
+        results.append({
+            "catalog": label,
+            "products": len(df),
+            "mode": mode,
+            "queries": len(mode_queries),
+            f"recall@{args.n}": round(float(np.mean(recalls)), 4) if recalls else None,
+            "identical": round(identical / len(mode_queries), 4) if len(mode_queries) else None,
+            **percentiles(latencies),
+            "build_s": round(build_seconds, 3),
+            "memory_mb": round(memory / 1e6, 2) if memory is not None else None,
+        })
+        print_row(results[-1], args.n)
+    return results
+
+
+def print_header(n):
+    print(f"{'catalog':>8} {'produse':>8} {'mod':>21} {'recall@' + str(n):>10} {'identic':>8} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'build s':>8} {'mem MB':>8}")
+
+
+def print_row(row, n):
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else "-"
+    print(f"{row['catalog']:>8} {row['products']:>8} {row['mode']:>21} {fmt(row[f'recall@{n}'], '10.4f')} "
+          f"{fmt(row['identical'], '8.2%')} {fmt(row['p50_ms'], '9.3f')} {fmt(row['p95_ms'], '9.3f')} "
+          f"{fmt(row['p99_ms'], '9.3f')} {row['build_s']:8.2f} {fmt(row['memory_mb'], '8.2f')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="store_products.csv")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4],
+                        help="factorii de mărire a catalogului (1 = CSV-ul original)")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--n", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--legacy-queries", type=int, default=5,
+                        help="interogări pentru get_n_recommandation (refit la fiecare apel)")
+    parser.add_argument("--k", type=int, default=50, help="K pentru tabela de vecini")
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--weights", type=json.loads, default=DEFAULT_WEIGHTS,
+                        help='ponderile modului weighted, ex. \'{"highlights": 0.3, "ingredients": 0.7}\'')
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="salvează rezultatele în acest fișier")
+    args = parser.parse_args()
+
+    base = load_catalog(args.csv, lean=False)
+    results = []
+    print_header(args.n)
+    for factor in args.sizes:
+        df = enlarge(base, factor, args.seed)
+        results.extend(evaluate(df, args.modes, args, f"x{factor}"))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": {k: v for k, v in vars(args).items() if k != "json"}, "results": results}, f, indent=2)
+        print(f"💾 Salvat în {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Metrici in-process expuse prin /api/metrics.
+
+Counters: contoare cu nume, sigure pentru mai multe thread-uri.
+MovingAverage: medie exponențială (EMA) a unor durate măsurate.
+StageEstimates: durata obișnuită a unei etape, per variantă, ca să decidem
+dacă etapa mai încape în bugetul unei cereri.
+"""
+
+import threading
+
+
+class Counters:
+    """Contoare cu nume (ex. "requests", "degraded")."""
+
+    def __init__(self, *names):
+        self._values = {name: 0 for name in names}
+        self._lock = threading.Lock()
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def get(self, name):
+        return self._values.get(name, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+
+class MovingAverage:
+    """Medie exponențială; primul eșantion devine valoarea inițială."""
+
+    def __init__(self, alpha=0.2, initial=0.0):
+        self.alpha = alpha
+        self.value = initial
+        self._seen = False
+        self._lock = threading.Lock()
+
+    def update(self, sample):
+        with self._lock:
+            if not self._seen:
+                self.value = sample
+                self._seen = True
+            else:
+                self.value += self.alpha * (sample - self.value)
+        return self.value
+
+    def decay(self, factor):
+        """Scade valoarea (ex. o estimare care nu mai poate fi remăsurată)."""
+        with self._lock:
+            self.value *= factor
+        return self.value
+
+
+class StageEstimates:
+    """
+    O medie mobilă per variantă a etapei (ex. modul de scor).
+
+    Etapa e sărită doar dacă estimarea nu încape în timpul rămas. O estimare
+    care blochează etapa nu se mai actualizează singură (etapa nu rulează),
+    deci la fiecare refuz scade cu factorul decay, iar după probe_every
+    refuzuri consecutive etapa rulează oricum și se remăsoară.
+    """
+
+    def __init__(self, alpha=0.2, decay=0.8, probe_every=10):
+        self.alpha = alpha
+        self.decay = decay
+        self.probe_every = probe_every
+        self._averages = {}
+        self._refused = {}
+        self._lock = threading.Lock()
+
+    def _average(self, key):
+        with self._lock:
+            average = self._averages.get(key)
+            if average is None:
+                average = self._averages[key] = MovingAverage(self.alpha)
+            return average
+
+    def estimate(self, key):
+        """Durata estimată (secunde); 0 pentru o variantă nemăsurată încă."""
+        average = self._averages.get(key)
+        return average.value if average is not None else 0.0
+
+    def should_run(self, key, remaining):
+        """Dacă etapa pornește cu `remaining` secunde rămase din buget."""
+        if remaining <= 0:
+            return False
+        average = self._average(key)
+        with self._lock:
+            if average.value <= remaining:
+                self._refused[key] = 0
+                return True
+            refused = self._refused.get(key, 0) + 1
+            probe = refused >= self.probe_every
+            self._refused[key] = 0 if probe else refused
+        average.decay(self.decay)
+        return probe
+
+    def update(self, key, sample):
+        return self._average(key).update(sample)
+
+    def snapshot(self):
+        """Estimările curente, în milisecunde."""
+        with self._lock:
+            return {key: round(average.value * 1000, 2) for key, average in self._averages.items()}
@@ -0,0 +1,215 @@
+"""
+Tabela precalculată de vecini (top-K produse similare pentru fiecare produs).
+
+Job offline: similaritatea se calculează pe blocuri de rânduri, astfel încât
+memoria de vârf e limitată indiferent de mărimea catalogului, iar blocurile
+pot fi împărțite pe mai multe procese. Rezultatul se salvează ca array
+compact pe disc (.npz: int32 pentru vecini, float32 pentru scoruri) și,
+opțional, în tabela Postgres product_neighbors. Fișierul conține și amprenta
+matricei din care a fost calculat: dacă textele produselor se schimbă (chiar
+cu aceleași id-uri), serverul nu îl mai folosește.
+
+Catalogul se citește din aceeași sursă ca serverul (CATALOG_SOURCE), sau
+din fișierul dat cu --csv.
+
+Rulare:
+    python neighbors.py --k 50 --jobs 4 --out product_neighbors.npz [--db] [--csv store_products.csv]
+"""
+
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Memoria maximă pentru blocul dens de similarități (per proces)
+MAX_BLOCK_BYTES = int(os.getenv("NEIGHBORS_MAX_BLOCK_BYTES", str(256 * 1024 * 1024)))
+
+# Setate în fiecare proces de _init_worker
+_matrix = None
+_valid = None
+_k = None
+
+
+def _init_worker(matrix, valid, k):
+    global _matrix, _valid, _k
+    _matrix, _valid, _k = matrix, valid, k
+
+
+def _block_top_k(bounds):
+    """Top-K vecini pentru rândurile [start, end) ale matricei."""
+    start, end = bounds
+    sims = _matrix[start:end].dot(_matrix.T).toarray().astype(np.float32)
+    sims[:, ~_valid] = -np.inf
+    sims[np.arange(end - start), np.arange(start, end)] = -np.inf
+
+    k = min(_k, sims.shape[1])
+    top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(sims, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1).astype(np.int32)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+    # mai puțini candidați decât K: pozițiile goale devin -1
+    top[~np.isfinite(top_scores)] = -1
+    top_scores[~np.isfinite(top_scores)] = 0
+    return start, top, top_scores
+
+
+def block_size_for(n_products, max_block_bytes=MAX_BLOCK_BYTES):
+    """Câte rânduri încap într-un bloc dens float32 de cel mult max_block_bytes."""
+    return max(1, max_block_bytes // (max(n_products, 1) * 4))
+
+
+def compute_neighbors(matrix, valid, k=50, n_jobs=1, block_size=None):
+    """
+    Calculează top-K vecini pentru fiecare rând al matricei (normalizată L2).
+
+    Returnează (indices int32 [n, K], scores float32 [n, K]); valid marchează
+    produsele care pot apărea ca vecini.
+    """
+    n = matrix.shape[0]
+    k = min(k, n)
+    block_size = block_size or block_size_for(n)
+    blocks = [(start, min(start + block_size, n)) for start in range(0, n, block_size)]
+
+    indices = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+
+    if n_jobs > 1 and len(blocks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(matrix, valid, k)) as pool:
+            results = pool.map(_block_top_k, blocks)
+            for start, top, top_scores in results:
+                indices[start:start + len(top)] = top
+                scores[start:start + len(top)] = top_scores
+    else:
+        _init_worker(matrix, valid, k)
+        for bounds in blocks:
+            start, top, top_scores = _block_top_k(bounds)
+            indices[start:start + len(top)] = top
+            scores[start:start + len(top)] = top_scores
+    return indices, scores
+
+
+def content_fingerprint(matrix, valid):
+    """Amprenta conținutului din care se calculează vecinii (matricea TF-IDF + produsele valide)."""
+    matrix = matrix.tocsr()
+    digest = hashlib.sha1()
+    for part in (matrix.indptr.astype(np.int64), matrix.indices.astype(np.int32),
+                 matrix.data.astype(np.float32), np.asarray(valid, dtype=bool)):
+        digest.update(np.ascontiguousarray(part).tobytes())
+    digest.update(str(matrix.shape).encode())
+    return digest.hexdigest()[:16]
+
+
+class NeighborTable:
+    """Vecinii precalculați, citiți din fișierul .npz."""
+
+    def __init__(self, product_ids, indices, scores, fingerprint=None):
+        self.product_ids = product_ids
+        self.indices = indices
+        self.scores = scores
+        self.fingerprint = fingerprint
+
+    @property
+    def k(self):
+        return self.indices.shape[1]
+
+    def matches(self, product_ids, fingerprint):
+        """
+        Tabela e valabilă doar pentru exact același catalog: aceleași produse,
+        în aceeași ordine, și același conținut (amprenta matricei).
+        """
+        return (self.fingerprint is not None and self.fingerprint == fingerprint and
+                len(product_ids) == len(self.product_ids) and bool(np.all(product_ids == self.product_ids)))
+
+    def neighbors(self, position):
+        row = self.indices[position]
+        return row[row >= 0]
+
+
+def save_neighbors(path, product_ids, indices, scores, fingerprint):
+    np.savez_compressed(path, product_ids=np.asarray(product_ids, dtype=str), indices=indices, scores=scores,
+                        fingerprint=np.asarray(fingerprint))
+
+
+def load_neighbors(path):
+    with np.load(path, allow_pickle=False) as data:
+        # fișierele vechi, fără amprentă, nu se potrivesc cu niciun catalog
+        fingerprint = str(data["fingerprint"]) if "fingerprint" in data else None
+        return NeighborTable(data["product_ids"], data["indices"], data["scores"], fingerprint)
+
+
+def store_neighbors_db(conn, product_ids, indices, scores):
+    """Rescrie tabela product_neighbors (product_id, rank, neighbor_id, score)."""
+    from psycopg2.extras import execute_values
+
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS product_neighbors (
+            product_id VARCHAR(36) NOT NULL,
+            rank SMALLINT NOT NULL,
+            neighbor_id VARCHAR(36) NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (product_id, rank)
+        );
+    """)
+    cur.execute("TRUNCATE product_neighbors;")
+
+    rows = (
+        (product_ids[i], rank, product_ids[j], float(scores[i, rank]))
+        for i in range(len(product_ids))
+        for rank, j in enumerate(indices[i])
+        if j >= 0
+    )
+    execute_values(cur, "INSERT INTO product_neighbors (product_id, rank, neighbor_id, score) VALUES %s",
+                   rows, page_size=5000)
+    conn.commit()
+    cur.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=None,
+                        help="citește catalogul din acest CSV (implicit: sursa serverului, CATALOG_SOURCE)")
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--block-size", type=int, default=None)
+    parser.add_argument("--out", default="product_neighbors.npz")
+    parser.add_argument("--db", action="store_true", help="scrie și în tabela Postgres product_neighbors")
+    args = parser.parse_args()
+
+    from recommendations import ProductIndex, COMBINED_FIELD, load_catalog
+    # aceeași sursă și ordine a produselor ca în server, altfel tabela nu se
+    # potrivește (serverul verifică amprenta textelor la încărcare)
+    from app import load_catalog_frame, CATALOG_LEAN, NORMALIZE_JOBS
+
+    started = time.perf_counter()
+    df_products = load_catalog(args.csv, lean=CATALOG_LEAN) if args.csv else load_catalog_frame()
+    index = ProductIndex(df_products, n_jobs=NORMALIZE_JOBS, lean=CATALOG_LEAN)
+    print(f"📦 Index construit: {len(index)} produse în {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    matrix = index.block(COMBINED_FIELD)
+    indices, scores = compute_neighbors(matrix, index.valid, k=args.k,
+                                        n_jobs=args.jobs, block_size=args.block_size)
+    print(f"✅ Top-{indices.shape[1]} vecini calculați în {time.perf_counter() - started:.1f}s")
+
+    save_neighbors(args.out, index.product_ids, indices, scores, content_fingerprint(matrix, index.valid))
+    print(f"💾 Salvat în {args.out}")
+
+    if args.db:
+        from app import get_db_connection
+        conn = get_db_connection()
+        try:
+            store_neighbors_db(conn, index.product_ids, indices, scores)
+            print("💾 Salvat în tabela product_neighbors")
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
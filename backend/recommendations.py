@@ -1,9 +1,12 @@
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+from scipy import sparse
 import ast
 import re
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 
 # clasa pt user
 class User:
@@ -16,81 +19,602 @@ class User:
         self.allergies = allergies
 
 
+## Tipare precompilate, refolosite la fiecare normalizare
+_TAG_RE = re.compile(r'<.*?>')
+_SPACE_RE = re.compile(r'\s+')
+
+# Sub acest numar de randuri nu merita pornit un pool de procese
+NORMALIZE_CHUNK_SIZE = 50000
+
+
 ## Normalizam coloanele
 def normalize_text(text):
     if pd.isna(text):
         return ""
-    text = re.sub(r'<.*?>', '', str(text))
+    text = _TAG_RE.sub('', str(text))
     text = text.encode("ascii", "ignore").decode()
-    text = re.sub(r'\s+', ' ', text)
+    text = _SPACE_RE.sub(' ', text)
     return text.strip().lower()
 
 
-def get_n_recommandation(df_products, col1="highlights",col2="ingredients", id = "P433469", N=1):
-    print(df_products.head(3), flush=True)
-    # df_exp = df_products
-    df_exp = df_products.copy()
-    df_exp[col1] = df_exp[col1].apply(normalize_text)
-    df_exp[col2] = df_exp[col2].apply(normalize_text)
+## Varianta vectorizata a lui normalize_text, pe o coloana intreaga
+def normalize_series(series):
+    s = series.fillna("").astype(str)
+    s = s.str.replace(_TAG_RE, '', regex=True)
+    s = s.str.encode("ascii", "ignore").str.decode("ascii")
+    s = s.str.replace(_SPACE_RE, ' ', regex=True)
+    return s.str.strip().str.lower()
 
-    df_exp["final_description"] = (
-    df_exp[col1].fillna('') + " " + df_exp[col2].fillna('')
-    ).str.strip()
 
-    df_exp["final_description"] = df_exp["final_description"].apply(normalize_text)
-    df_exp = df_exp.drop_duplicates(subset=["final_description"])
-    df_exp = df_exp.reset_index(drop=True)
-    df_exp = df_exp[df_exp["final_description"].str.strip() != ""]
-    df_exp = df_exp.drop_duplicates(subset=["final_description"])
+## Normalizeaza mai multe coloane o singura data fiecare
+## n_jobs > 1 imparte cataloagele mari pe bucati intr-un pool de procese
+def normalize_columns(df, columns, n_jobs=1, chunk_size=NORMALIZE_CHUNK_SIZE):
+    result = {}
+    use_pool = n_jobs > 1 and len(df) > chunk_size
+    if not use_pool:
+        for col in columns:
+            result[col] = normalize_series(df[col])
+        return pd.DataFrame(result, index=df.index)
 
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        for col in columns:
+            chunks = [df[col].iloc[i:i + chunk_size] for i in range(0, len(df), chunk_size)]
+            result[col] = pd.concat(pool.map(normalize_series, chunks))
+    return pd.DataFrame(result, index=df.index)
 
-    tfidf = TfidfVectorizer(stop_words='english')
-    tfidf_matrix = tfidf.fit_transform(df_exp["final_description"])
 
-    cosine_sim = cosine_similarity(tfidf_matrix, tfidf_matrix)
+## Campurile text indexate; "final_description" e concatenarea lor
+## (documentul unic folosit initial de get_n_recommandation)
+DEFAULT_FIELDS = ("highlights", "ingredients")
+COMBINED_FIELD = "final_description"
 
-    produs_index = df_exp.index.get_loc(df_exp[df_exp["product_id"] == id].index[0])
+## Termeni optionali (non-text) care pot primi pondere la cerere
+EXTRA_TERMS = ("price", "rating", "brand")
 
-    ## similaritate produs dorit cu celelalte
-    similarities = cosine_sim[produs_index]
-    similarities[produs_index] = 0
+## Moduri de scor: TF-IDF pe text sau similaritate pe multimea de ingrediente
+SCORERS = ("tfidf", "jaccard", "overlap")
 
-    max_score = 0
-    similarities[produs_index] = -1
-    top_indices = np.argsort(similarities)[::-1]
+## Virgula care nu e in interiorul unei paranteze: "Water (Aqua, Eau), Glycerin"
+_INGREDIENT_SPLIT_RE = re.compile(r',(?![^()]*\))')
+_INGREDIENT_STRIP = " .*\t\n"
 
-    return top_indices[:N]
 
-# Filtrare dupa un camp anume si cuvant cheie
-def filter(df, column="highlights", keyword=""):
-    def contains_keyword(x):
-        if isinstance(x, list):
-            return any(keyword.lower() in str(i).lower() for i in x)
+## Lista de ingrediente canonice (INCI, lowercase) dintr-o celula din CSV
+def parse_ingredients(text):
+    if not isinstance(text, str) or not text.strip():
+        return []
+    try:
+        parsed = ast.literal_eval(text)
+        parts = parsed if isinstance(parsed, list) else [text]
+    except (ValueError, SyntaxError):
+        parts = [text]
 
-        if isinstance(x, str):
-            try:
-                parsed = ast.literal_eval(x)
-                if isinstance(parsed, list):
-                    return any(keyword.lower() in str(i).lower() for i in parsed)
-            except:
-                return keyword.lower() in x.lower()
+    names = []
+    for part in parts:
+        for name in _INGREDIENT_SPLIT_RE.split(str(part)):
+            name = _SPACE_RE.sub(' ', name).strip(_INGREDIENT_STRIP).lower()
+            if name:
+                names.append(name)
+    return names
 
-        return False
-    return df[df[column].apply(contains_keyword)].copy()
 
-# Filtrare elimina in functie de continut
-def filter_out(df, column="highlights", keyword=""):
-    def contains_keyword(x):
-        if isinstance(x, list):
-            return any(keyword.lower() not in str(i).lower() for i in x)
+## Interneaza fiecare ingredient intr-un ID intreg si construieste
+## matricea CSR binara produse x ingrediente
+def build_ingredient_matrix(series):
+    """Returneaza (matricea CSR, vocabularul nume -> ID)."""
+    vocabulary = {}
+    indptr = [0]
+    indices = []
+    for text in series:
+        ids = {vocabulary.setdefault(name, len(vocabulary)) for name in parse_ingredients(text)}
+        indices.extend(sorted(ids))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float32)
+    matrix = sparse.csr_matrix(
+        (data, np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int32)),
+        shape=(len(indptr) - 1, len(vocabulary))
+    )
+    return matrix, vocabulary
+
+
+## Separator intre elementele unei liste in textul pregatit pentru cautare:
+## nu apare in cuvintele cheie, deci o potrivire nu trece peste doua elemente
+_ITEM_SEPARATOR = "\x00"
+
 
-        if isinstance(x, str):
+class KeywordMatcher:
+    """
+    Mai multe cuvinte cheie (sau alergeni) compilate intr-un singur tipar,
+    o alternanta de subsiruri lowercase: fiecare text se parcurge o singura
+    data, indiferent cate cuvinte sunt. Se construieste o data per cerere.
+    """
+
+    def __init__(self, keywords):
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        terms = (str(k).lower() for k in (keywords or []) if k)
+        self.terms = tuple(dict.fromkeys(t for t in terms if t))
+        self.pattern = re.compile("|".join(map(re.escape, self.terms))) if self.terms else None
+
+    def __bool__(self):
+        return self.pattern is not None
+
+    def matches(self, texts):
+        """Pentru fiecare text (deja lowercase): contine macar un cuvant cheie."""
+        if self.pattern is None:
+            return np.zeros(len(texts), dtype=bool)
+        search = self.pattern.search
+        return np.fromiter((search(t) is not None for t in texts), dtype=bool, count=len(texts))
+
+    def mask(self, texts, mode="any"):
+        """mode="any": textele cu macar un cuvant cheie; "none": cele fara niciunul."""
+        if mode not in ("any", "none"):
+            raise ValueError(f"Mod necunoscut: {mode} (disponibile: any, none)")
+        hits = self.matches(texts)
+        return hits if mode == "any" else ~hits
+
+
+## Textul unei coloane (liste sau text simplu) pregatit o singura data
+## pentru KeywordMatcher: lowercase, elementele listei unite prin
+## _ITEM_SEPARATOR; valorile pe care filter nu le potrivea devin ""
+def searchable_text(series):
+    def prepare(x):
+        if isinstance(x, list):
+            items = x
+        elif isinstance(x, str):
             try:
                 parsed = ast.literal_eval(x)
-                if isinstance(parsed, list):
-                    return any(keyword.lower() not in str(i).lower() for i in parsed)
-            except:
-                return keyword.lower() not in x.lower()
+            except Exception:
+                return x.lower()
+            if not isinstance(parsed, list):
+                return ""
+            items = parsed
+        else:
+            return ""
+        return _ITEM_SEPARATOR.join(str(i).lower() for i in items)
+    return np.array([prepare(x) for x in series], dtype=object)
+
+
+## Jaccard / overlap intre produsul ref si toate celelalte, printr-un produs sparse
+def set_similarity(matrix, sizes, ref, scorer="jaccard"):
+    inter = matrix.dot(matrix[ref].T).toarray().ravel()
+    if scorer == "jaccard":
+        denom = sizes + sizes[ref] - inter
+    else:
+        denom = np.minimum(sizes, sizes[ref])
+    return np.divide(inter, denom, out=np.zeros_like(inter), where=denom > 0)
+
+
+## Coloanele din CSV folosite de backend, cu tipurile din modul "lean"
+## (restul coloanelor, ex. variation_desc sau child_max_price, nu se citesc)
+CATALOG_DTYPES = {
+    "product_id": str,
+    "product_name": str,
+    "brand_name": "category",
+    "loves_count": "float32",
+    "rating": "float64",
+    "reviews": "float32",
+    "ingredients": str,
+    "price_usd": "float64",
+    "highlights": str,
+    "primary_category": "category",
+    "secondary_category": "category",
+    "assigned_skin_type": "category",
+    "out_of_stock": "float32",
+}
+
+
+## Incarca catalogul din CSV
+## lean=False pastreaza comportamentul vechi: toate coloanele, ca text
+def load_catalog(filename, lean=True):
+    if not lean:
+        return pd.read_csv(filename, dtype=str, low_memory=False)
+    return pd.read_csv(filename, usecols=list(CATALOG_DTYPES), dtype=CATALOG_DTYPES, low_memory=False)
+
+
+## Aplica tipurile din CATALOG_DTYPES pe un catalog venit din alta sursa (ex. DB)
+def apply_catalog_dtypes(df):
+    columns = [c for c in CATALOG_DTYPES if c in df]
+    df = df[columns].copy()
+    for column in columns:
+        dtype = CATALOG_DTYPES[column]
+        if dtype is str:
+            df[column] = df[column].astype(object).where(df[column].notna(), None)
+        elif dtype == "category":
+            df[column] = df[column].astype("category")
+        else:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype(dtype)
+    return df
+
+
+def _fit_block(texts, fit_mask, dtype=np.float64):
+    # vocabularul si IDF se invata doar pe randurile eligibile (ca inainte,
+    # cand duplicatele si textele goale erau sterse inainte de fit)
+    tfidf = TfidfVectorizer(stop_words='english', dtype=dtype)
+    try:
+        tfidf.fit(texts[fit_mask])
+    except ValueError:
+        # vocabular gol (ex. doar stop words) -> bloc de zerouri
+        return sparse.csr_matrix((len(texts), 0), dtype=dtype)
+    return tfidf.transform(texts).tocsr()
+
+
+## Preturile si rating-urile raman float64 (comparatiile cu filtrele trebuie
+## sa fie exacte); contoarele intregi incap fara pierderi in float32
+def _numeric_column(df, column, dtype=np.float64):
+    if column not in df:
+        return np.full(len(df), np.nan, dtype=dtype)
+    return pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=dtype)
+
+
+def _to_int32(matrix):
+    # scipy alege uneori indici int64; pentru cataloagele noastre int32 ajunge
+    matrix.indices = matrix.indices.astype(np.int32, copy=False)
+    matrix.indptr = matrix.indptr.astype(np.int32, copy=False)
+    return matrix
+
+
+class CompressedTexts:
+    """
+    O coloana text tinuta compact: fiecare valoare comprimata separat (zlib),
+    toate intr-un singur buffer cu offset-uri. Pentru citiri rare pe pozitie
+    (ex. ingredientele in pagina de detalii in modul lean).
+    """
+
+    def __init__(self, series):
+        chunks = []
+        self.offsets = np.zeros(len(series) + 1, dtype=np.int64)
+        self.missing = np.zeros(len(series), dtype=bool)
+        for i, value in enumerate(series):
+            if isinstance(value, str):
+                chunks.append(zlib.compress(value.encode("utf-8")))
+            else:
+                self.missing[i] = True
+                chunks.append(b"")
+            self.offsets[i + 1] = self.offsets[i] + len(chunks[-1])
+        self.buffer = b"".join(chunks)
+
+    def __len__(self):
+        return len(self.missing)
+
+    def get(self, pos):
+        if self.missing[pos]:
+            return None
+        return zlib.decompress(self.buffer[self.offsets[pos]:self.offsets[pos + 1]]).decode("utf-8")
+
+    @property
+    def nbytes(self):
+        return len(self.buffer) + self.offsets.nbytes + self.missing.nbytes
+
+
+def _sparse_nbytes(matrix):
+    if matrix is None:
+        return 0
+    return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+
+## Filtrele pe intervale numerice acceptate de ProductIndex.range_mask
+RANGE_FILTERS = ("min_price", "max_price", "min_rating", "min_reviews")
+
+
+class SortedColumnIndex:
+    """
+    Valorile unei coloane numerice, sortate o singura data.
+
+    Un filtru pe interval devine doua cautari binare si o felie din ordinea
+    sortata, fara sa parcurgem fiecare rand. Valorile lipsa (NaN) nu trec
+    niciun filtru.
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        known = np.flatnonzero(~np.isnan(values))
+        self.order = known[np.argsort(values[known], kind="stable")]
+        self.sorted_values = values[self.order]
+        self.size = len(values)
 
-        return True
-    return df[df[column].apply(contains_keyword)].copy()
\ No newline at end of file
+    def positions(self, low=None, high=None):
+        """Pozitiile cu low <= valoare <= high (capete optionale)."""
+        start = 0 if low is None else np.searchsorted(self.sorted_values, low, side="left")
+        end = len(self.sorted_values) if high is None else np.searchsorted(self.sorted_values, high, side="right")
+        return self.order[start:end]
+
+    def mask(self, low=None, high=None):
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.positions(low, high)] = True
+        return mask
+
+
+## Pozitiile fiecarei valori (lowercase, "" = necompletat) dintr-o coloana text
+def build_postings(df, column):
+    if column not in df:
+        return {}
+    values = df[column].astype(object).fillna("").str.strip().str.lower()
+    return values.groupby(values).indices
+
+
+class ProductIndex:
+    """
+    Index de similaritate construit o singura data pe tot catalogul.
+
+    Fiecare camp text are propriul bloc TF-IDF (normalizat L2 separat),
+    tinut ca matrice CSR proprie. La cerere, ponderile campurilor (si ale
+    termenilor price/rating/brand) se combina fara refit; se inmultesc doar
+    blocurile cu pondere nenula.
+
+    lean=True: matrice float32 cu indici int32, iar textul brut al
+    ingredientelor e sters dupa vectorizare (alergenii se cauta in
+    vocabularul de ingrediente); pentru pagina de detalii ramane doar
+    comprimat (ingredients_text). highlights ramane: apare in raspunsuri.
+    """
+
+    def __init__(self, df_products, fields=DEFAULT_FIELDS, n_jobs=1,
+                 ingredients_field="ingredients", text=True, lean=False):
+        self.df = df_products.reset_index(drop=True)
+        self.fields = tuple(fields) + (COMBINED_FIELD,)
+        self.product_ids = self.df["product_id"].to_numpy()
+        # prima aparitie castiga, ca la cautarea din get_n_recommandation
+        self.position = {}
+        for i, pid in enumerate(self.product_ids):
+            self.position.setdefault(pid, i)
+
+        normalized = normalize_columns(self.df, list(fields), n_jobs=n_jobs)
+        texts = {f: normalized[f] for f in fields}
+        combined = normalized[fields[0]]
+        for f in fields[1:]:
+            combined = combined + " " + normalized[f]
+        texts[COMBINED_FIELD] = combined.str.strip()
+
+        # produse care pot fi recomandate: descriere nevida, fara duplicate
+        final = texts[COMBINED_FIELD]
+        self.valid = ((final != "") & ~final.duplicated()).to_numpy()
+
+        # text=False: doar scorurile pe ingrediente (fara fit TF-IDF)
+        self.blocks = {}
+        dtype = np.float32 if lean else np.float64
+        for f in (self.fields if text else ()):
+            block = _fit_block(texts[f], self.valid, dtype)
+            self.blocks[f] = _to_int32(block) if lean else block
+        del texts, combined, final, normalized
+
+        # multimile de ingrediente, pentru scorurile jaccard / overlap si alergeni;
+        # ingredient_names[i] e numele canonic al ingredientului cu ID-ul i
+        self.ingredient_matrix = None
+        self.ingredient_names = pd.Series([], dtype=object)
+        self.ingredients_text = None
+        if ingredients_field in self.df:
+            self.ingredient_matrix, vocabulary = build_ingredient_matrix(self.df[ingredients_field])
+            self.ingredient_names = pd.Series(list(vocabulary), dtype=object)
+            self.ingredient_sizes = np.asarray(self.ingredient_matrix.sum(axis=1), dtype=np.float32).ravel()
+            if lean:
+                self.ingredients_text = CompressedTexts(self.df[ingredients_field])
+                self.df = self.df.drop(columns=[ingredients_field])
+
+        self.price = _numeric_column(self.df, "price_usd")
+        self.rating = _numeric_column(self.df, "rating")
+        self.brand = self.df["brand_name"].astype(object).fillna("").to_numpy() if "brand_name" in self.df else None
+        self.reviews = _numeric_column(self.df, "reviews", np.float32)
+
+        # indexuri sortate pentru filtrele pe intervale
+        self.column_indexes = {
+            "price": SortedColumnIndex(self.price),
+            "rating": SortedColumnIndex(self.rating),
+            "reviews": SortedColumnIndex(self.reviews),
+        }
+
+        # highlights lowercase, pregatit o data pentru filtrele pe cuvinte cheie
+        self.highlights_text = searchable_text(self.df["highlights"]) if "highlights" in self.df \
+            else np.full(len(self.df), "", dtype=object)
+
+        # posting lists pe tipul de piele si pe categorie ("" = necompletat)
+        self.skin_type_postings = build_postings(self.df, "assigned_skin_type")
+        self.category_postings = build_postings(self.df, "secondary_category")
+
+        # ordinea de popularitate (loves_count descrescator), pentru fallback
+        self.loves = _numeric_column(self.df, "loves_count", np.float32)
+        self.popularity_order = np.argsort(-np.nan_to_num(self.loves, nan=-1.0), kind="stable")
+
+        # tabela optionala de vecini precalculati (vezi neighbors.py)
+        self.neighbors = None
+        # snapshot-ul pentru endpoint-urile de listare (vezi snapshot.py)
+        self.snapshot = None
+        # amprenta catalogului pentru listele Cold Start (vezi cold_start.py)
+        self.fingerprint = None
+
+    def __len__(self):
+        return len(self.df)
+
+    def block(self, field):
+        """Blocul TF-IDF al unui camp (matricea lui, fara copie)."""
+        return self.blocks[field]
+
+    def range_mask(self, min_price=None, max_price=None, min_rating=None, min_reviews=None):
+        """Masca produselor care respecta toate filtrele numerice date."""
+        mask = np.ones(len(self.df), dtype=bool)
+        if min_price is not None or max_price is not None:
+            mask &= self.column_indexes["price"].mask(min_price, max_price)
+        if min_rating is not None:
+            mask &= self.column_indexes["rating"].mask(min_rating)
+        if min_reviews is not None:
+            mask &= self.column_indexes["reviews"].mask(min_reviews)
+        return mask
+
+    def skin_type_mask(self, skin_type):
+        """Produsele pentru skin_type, plus cele marcate "all" sau fara tip."""
+        mask = np.zeros(len(self.df), dtype=bool)
+        for value in (skin_type.strip().lower(), "all", ""):
+            mask[self.skin_type_postings.get(value, [])] = True
+        return mask
+
+    def category_mask(self, category):
+        """Produsele din categorie; fara categorie (None, NaN, "") nu se restrange nimic."""
+        category = category.strip().lower() if isinstance(category, str) else ""
+        if not category:
+            return np.ones(len(self.df), dtype=bool)
+        mask = np.zeros(len(self.df), dtype=bool)
+        mask[self.category_postings.get(category, [])] = True
+        return mask
+
+    def ingredient_mask(self, keywords):
+        """Produsele care contin un ingredient al carui nume include oricare dintre keywords."""
+        mask = np.zeros(len(self.df), dtype=bool)
+        matcher = keywords if isinstance(keywords, KeywordMatcher) else KeywordMatcher(keywords)
+        if self.ingredient_matrix is None or not matcher:
+            return mask
+        # o singura trecere prin vocabular pentru toate cuvintele
+        hits = matcher.matches(self.ingredient_names.to_numpy()).astype(np.float32)
+        if hits.any():
+            mask = self.ingredient_matrix.dot(hits) > 0
+        return mask
+
+    def allergen_free_mask(self, allergens):
+        """Produsele fara niciunul dintre alergeni in lista de ingrediente."""
+        return ~self.ingredient_mask(allergens)
+
+    def keyword_hits(self, keywords, positions, mode="any"):
+        """
+        Pentru fiecare pozitie din positions: highlights contine macar unul
+        dintre keywords (mode="any") sau niciunul (mode="none").
+        """
+        matcher = keywords if isinstance(keywords, KeywordMatcher) else KeywordMatcher(keywords)
+        return matcher.mask(self.highlights_text[positions], mode)
+
+    def keyword_mask(self, keywords, candidates=None, mode="any"):
+        """Masca produselor (dintre candidates) filtrate dupa keywords in highlights."""
+        positions = np.arange(len(self.df)) if candidates is None else np.flatnonzero(candidates)
+        mask = np.zeros(len(self.df), dtype=bool)
+        mask[positions[self.keyword_hits(keywords, positions, mode)]] = True
+        return mask
+
+    def memory_report(self):
+        """Memoria (bytes) ocupata de fiecare componenta a indexului."""
+        names = self.ingredient_names
+        return {
+            "catalog": int(self.df.memory_usage(deep=True).sum()),
+            "vocabulary": int(names.memory_usage(deep=True)),
+            "tfidf_matrix": sum(_sparse_nbytes(block) for block in self.blocks.values()),
+            "ingredient_matrix": _sparse_nbytes(self.ingredient_matrix),
+            "column_indexes": int(sum(
+                idx.order.nbytes + idx.sorted_values.nbytes for idx in self.column_indexes.values()
+            ) + self.price.nbytes + self.rating.nbytes + self.reviews.nbytes + self.loves.nbytes),
+            "postings": int(sum(
+                p.nbytes for postings in (self.skin_type_postings, self.category_postings) for p in postings.values()
+            ) + self.popularity_order.nbytes + self.valid.nbytes),
+            "position_map": int(sys.getsizeof(self.position)),
+            "ingredients_text": self.ingredients_text.nbytes if self.ingredients_text is not None else 0,
+            "search_text": int(self.highlights_text.nbytes + sum(sys.getsizeof(t) for t in self.highlights_text)),
+        }
+
+    def popular(self, N, mask=None):
+        """Primele N produse din mask, in ordinea popularitatii."""
+        order = self.popularity_order
+        if mask is not None:
+            order = order[mask[order]]
+        return order[:N]
+
+    def validate_weights(self, weights, scorer="tfidf"):
+        unknown = set(weights) - set(self.fields) - set(EXTRA_TERMS)
+        if unknown:
+            raise ValueError(f"Ponderi necunoscute: {sorted(unknown)}")
+        if any(float(w) < 0 for w in weights.values()):
+            raise ValueError("Ponderile trebuie sa fie pozitive")
+        if scorer not in SCORERS:
+            raise ValueError(f"Scorer necunoscut: {scorer} (disponibile: {', '.join(SCORERS)})")
+
+    def scores(self, ref, weights=None, scorer="tfidf"):
+        """
+        Scorul combinat al tuturor produselor fata de produsul de pe pozitia ref.
+
+        scorer="tfidf": suma ponderata a cosinusurilor pe campuri (implicit
+        documentul unic final_description); "jaccard"/"overlap": similaritatea
+        multimilor de ingrediente. Termenii price/rating/brand se adauga in ambele.
+        """
+        weights = dict(weights or {})
+        self.validate_weights(weights, scorer)
+
+        if scorer == "tfidf":
+            if not self.blocks:
+                raise ValueError("Indexul a fost construit fara blocuri TF-IDF")
+            if not any(weights.get(f) for f in self.fields):
+                weights[COMBINED_FIELD] = 1.0
+            # doar blocurile cu pondere nenula: fiecare e un produs
+            # matrice rara x randul (dens) al produsului de referinta
+            total = np.zeros(len(self.df))
+            for f in self.fields:
+                weight = float(weights.get(f, 0))
+                if weight:
+                    block = self.blocks[f]
+                    total += weight * block.dot(block[ref].toarray().ravel())
+        else:
+            if self.ingredient_matrix is None:
+                raise ValueError("Catalogul nu are coloana de ingrediente")
+            # ponderile campurilor text nu se aplica; multimea are ponderea 1
+            weights = {k: w for k, w in weights.items() if k in EXTRA_TERMS}
+            weights["ingredients"] = 1.0
+            total = set_similarity(self.ingredient_matrix, self.ingredient_sizes, ref, scorer)
+
+        if weights.get("price"):
+            ref_price = self.price[ref]
+            if ref_price > 0:
+                ratio = np.minimum(self.price, ref_price) / np.maximum(self.price, ref_price)
+                total += float(weights["price"]) * np.nan_to_num(ratio)
+        if weights.get("rating"):
+            total += float(weights["rating"]) * np.nan_to_num(self.rating / 5.0)
+        if weights.get("brand") and self.brand is not None:
+            total += float(weights["brand"]) * (self.brand == self.brand[ref])
+
+        weight_sum = sum(float(w) for w in weights.values())
+        return total / weight_sum if weight_sum else total
+
+    def recommend(self, product_id, N=5, weights=None, mask=None, scorer="tfidf"):
+        """
+        Returneaza pozitiile (in self.df) celor mai similare N produse.
+
+        mask: vector boolean optional cu produsele candidate (filtrele cererii).
+        """
+        ref = self.position[product_id]
+        similarities = self.scores(ref, weights, scorer)
+        allowed = self.valid if mask is None else (self.valid & mask)
+        return top_n(similarities, allowed, N, exclude=ref)
+
+
+## Cele mai mari N scoruri dintre pozitiile permise, descrescator
+def top_n(scores, allowed, N, exclude=None):
+    scores = np.where(allowed, scores, -np.inf)
+    if exclude is not None:
+        scores[exclude] = -np.inf
+    n_candidates = int(np.isfinite(scores).sum())
+    N = min(N, n_candidates)
+    if N <= 0:
+        return np.array([], dtype=int)
+    top = np.argpartition(-scores, N - 1)[:N]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def get_n_recommandation(df_products, col1="highlights",col2="ingredients", id = "P433469", N=1, n_jobs=1, weights=None, scorer="tfidf"):
+    """
+    Returneaza pozitiile (in df_products) celor mai similare N produse cu id.
+
+    Fara weights se foloseste documentul unic final_description (col1 + col2);
+    cu weights (ex. {"highlights": 0.3, "ingredients": 0.7, "rating": 0.1})
+    se combina blocurile pe campuri. scorer="jaccard" sau "overlap" compara
+    multimile de ingrediente (coloana "ingredients") in loc de TF-IDF.
+    """
+    index = ProductIndex(df_products, fields=(col1, col2), n_jobs=n_jobs, text=(scorer == "tfidf"))
+    return index.recommend(id, N, weights=weights, scorer=scorer)
+
+# Filtrare dupa un camp anume si cuvant cheie (sau o lista de cuvinte:
+# raman randurile care contin oricare dintre ele)
+def filter(df, column="highlights", keyword=""):
+    matcher = KeywordMatcher(keyword)
+    if not matcher:
+        return df.copy()
+    return df[matcher.mask(searchable_text(df[column]), "any")].copy()
+
+# Filtrare elimina in functie de continut: raman randurile care nu contin
+# niciunul dintre cuvinte
+def filter_out(df, column="highlights", keyword=""):
+    matcher = KeywordMatcher(keyword)
+    if not matcher:
+        return df.copy()
+    return df[matcher.mask(searchable_text(df[column]), "none")].copy()
@@ -0,0 +1,160 @@
+"""
+Snapshot in-memory al catalogului pentru endpoint-urile de listare.
+
+Folosește același DataFrame ca indexul de recomandări (o singură copie a
+catalogului), plus structuri precalculate: ordinile de sortare după
+loves_count, rating și preț, posting lists pe categorii și tip de piele
+și numele / brandurile în lowercase pentru căutare.
+"""
+
+import numpy as np
+import pandas as pd
+
+from recommendations import build_postings
+
+# Câmpurile din răspunsuri (cheia JSON -> coloana din catalog)
+PRODUCT_FIELDS = {
+    "product_id": "product_id",
+    "product_name": "product_name",
+    "brand_name": "brand_name",
+    "price": "price_usd",
+    "primary_category": "primary_category",
+    "secondary_category": "secondary_category",
+    "rating": "rating",
+    "reviews": "reviews",
+    "loves_count": "loves_count",
+    "skin_type": "assigned_skin_type",
+    "highlights": "highlights",
+    "ingredients": "ingredients",
+}
+
+# Câmpuri numerice întregi (în catalogul "lean" sunt stocate ca float32)
+INT_FIELDS = ("reviews", "loves_count")
+# Câmpurile numerice se citesc din array-urile indexului, nu din DataFrame:
+# cu CATALOG_LEAN=0 și sursa CSV coloanele brute pot fi text
+NUMERIC_FIELDS = ("price", "rating", "reviews", "loves_count")
+
+# Sortările disponibile; toate pun valorile lipsă la final
+SORT_ORDERS = ("loves_count", "rating", "price")
+
+
+def _sort_keys(values, descending):
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isnan(values), np.inf, -values if descending else values)
+
+
+def _sort_order(values, descending, tie_break=None):
+    keys = _sort_keys(values, descending)
+    if tie_break is None:
+        return np.argsort(keys, kind="stable")
+    # lexsort: ultima cheie este cea principală
+    return np.lexsort((_sort_keys(tie_break, descending=True), keys))
+
+
+class CatalogSnapshot:
+    """Listare, detalii și categorii răspunse din memorie."""
+
+    def __init__(self, index):
+        self.index = index
+        self.df = index.df
+        n = len(self.df)
+
+        if "out_of_stock" in self.df:
+            self.in_stock = (pd.to_numeric(self.df["out_of_stock"], errors="coerce").fillna(0) == 0).to_numpy()
+        else:
+            self.in_stock = np.ones(n, dtype=bool)
+        self.total_in_stock = int(self.in_stock.sum())
+
+        self.sort_orders = {
+            # la egalitate decide rating-ul, ca în ORDER BY loves_count DESC, rating DESC
+            "loves_count": _sort_order(index.loves, descending=True, tie_break=index.rating),
+            "rating": _sort_order(index.rating, descending=True),
+            "price": _sort_order(index.price, descending=False),
+        }
+
+        self.numeric = {"price": index.price, "rating": index.rating,
+                        "reviews": index.reviews, "loves_count": index.loves}
+
+        self.primary_postings = build_postings(self.df, "primary_category")
+        self.secondary_postings = index.category_postings
+        self.skin_type_postings = index.skin_type_postings
+
+        self.name_lower = self.df["product_name"].astype(object).fillna("").str.lower()
+        self.brand_lower = self.df["brand_name"].astype(object).fillna("").str.lower()
+
+        categories = self.df["primary_category"].dropna().astype(str).str.strip()
+        self.categories = sorted(c for c in categories.unique() if c)
+
+    @staticmethod
+    def substring_mask(n, postings, term):
+        # echivalentul ILIKE '%term%': toate valorile distincte care conțin termenul
+        mask = np.zeros(n, dtype=bool)
+        term = term.strip().lower()
+        for value, positions in postings.items():
+            if term in value:
+                mask[positions] = True
+        return mask
+
+    def query(self, category="", skin_type="", search="", range_filters=None,
+              sort="loves_count", limit=50, offset=0):
+        """Pozițiile produselor în stoc care respectă filtrele, sortate și paginate."""
+        if sort not in self.sort_orders:
+            raise ValueError(f"Sortare necunoscută: {sort} (disponibile: {', '.join(SORT_ORDERS)})")
+        mask = self.mask(category, skin_type, search, range_filters)
+        order = self.sort_orders[sort]
+        order = order[mask[order]]
+        return order[offset:offset + limit]
+
+    def mask(self, category="", skin_type="", search="", range_filters=None):
+        """Masca produselor în stoc care respectă filtrele (aceeași semantică ca ILIKE)."""
+        n = len(self.df)
+        mask = self.in_stock.copy()
+
+        if category:
+            mask &= (self.substring_mask(n, self.primary_postings, category) |
+                     self.substring_mask(n, self.secondary_postings, category))
+        if skin_type:
+            mask &= self.substring_mask(n, self.skin_type_postings, skin_type)
+        if range_filters:
+            mask &= self.index.range_mask(**range_filters)
+        if search:
+            # căutarea pe text rulează doar pe candidații rămași
+            candidates = np.flatnonzero(mask)
+            term = search.lower()
+            hits = (self.name_lower.iloc[candidates].str.contains(term, regex=False) |
+                    self.brand_lower.iloc[candidates].str.contains(term, regex=False)).to_numpy()
+            mask[:] = False
+            mask[candidates[hits]] = True
+        return mask
+
+    def position(self, product_id):
+        return self.index.position.get(product_id)
+
+    def has_field(self, field):
+        if field == "ingredients" and self.index.ingredients_text is not None:
+            return True
+        return PRODUCT_FIELDS[field] in self.df
+
+    def product(self, pos, fields):
+        """Dicționarul JSON pentru produsul de pe poziția pos (doar câmpurile cerute)."""
+        result = {}
+        for field in fields:
+            column = PRODUCT_FIELDS[field]
+            if field in NUMERIC_FIELDS and column in self.df:
+                value = self.numeric[field][pos]
+            elif field == "ingredients" and column not in self.df and self.index.ingredients_text is not None:
+                # modul lean: textul brut e păstrat doar comprimat
+                result[field] = self.index.ingredients_text.get(pos)
+                continue
+            elif column not in self.df:
+                continue
+            else:
+                value = self.df[column].iat[pos]
+            if pd.isna(value):
+                value = None
+            elif field in INT_FIELDS:
+                value = int(value)
+            elif isinstance(value, np.generic):
+                value = value.item()
+            result[field] = value
+        return result
@@ -0,0 +1,227 @@
+"""
+Vectori de gust ai utilizatorilor, din istoricul de recomandări.
+
+Gustul unui utilizator este centroidul, ponderat cu decădere exponențială,
+al vectorilor TF-IDF (documentul combinat) ai produselor pentru care a
+cerut recomandări. Se reține compact ca ponderi pe produse (product_id ->
+pondere la momentul reference_time), nu ca vector în spațiul termenilor:
+rămâne valabil după o reîncărcare a catalogului (vocabular nou), iar un
+eveniment nou doar decade ponderile și adaugă una. Vectorul în spațiul
+termenilor se calculează o dată per versiune de catalog și se ține în
+memorie (dens); scorarea e un singur produs între blocul TF-IDF al
+indexului (fără copie) și acest vector, + top-N.
+
+Ponderile se salvează în tabela user_taste_vectors (product_ids TEXT[],
+weights BYTEA float32) împreună cu ultimul id din recommendation_history
+inclus, deci la o încărcare se citesc doar rândurile noi din istoric.
+Fiecare worker are propriul cache: salvarea nu suprascrie niciodată un
+rând cu last_history_id mai mare, iar un worker rămas în urmă se reîncarcă.
+"""
+
+import threading
+import time
+import weakref
+
+from cache import TTLCache
+
+# Câte rânduri noi din istoric se citesc cel mult la o încărcare
+MAX_CATCH_UP_ROWS = 1000
+
+
+class TasteProfile:
+    """Ponderile produselor văzute de un utilizator, decăzute la reference_time."""
+
+    def __init__(self, weights=None, reference_time=None, last_history_id=0):
+        self.weights = dict(weights or {})
+        self.reference_time = reference_time or time.time()
+        self.last_history_id = last_history_id
+        self.lock = threading.Lock()
+        # (referință slabă la index, vector dens de termeni) pentru versiunea de catalog curentă
+        self._vector = None
+
+    def add(self, product_id, weight, at, half_life, max_products):
+        """Adaugă o vizualizare de la momentul at (ponderile vechi decad până la at)."""
+        if at > self.reference_time:
+            factor = 0.5 ** ((at - self.reference_time) / half_life)
+            self.weights = {pid: w * factor for pid, w in self.weights.items()}
+            self.reference_time = at
+        else:
+            weight *= 0.5 ** ((self.reference_time - at) / half_life)
+        self.weights[product_id] = self.weights.get(product_id, 0.0) + weight
+        if len(self.weights) > max_products:
+            kept = sorted(self.weights.items(), key=lambda item: item[1], reverse=True)[:max_products]
+            self.weights = dict(kept)
+        self._vector = None
+
+    def vector(self, index, field):
+        """Centroidul normalizat L2 al rândurilor TF-IDF, sau None dacă nu e niciun produs în catalog."""
+        cached = self._vector
+        if cached is not None and cached[0]() is index:
+            return cached[1]
+
+        import numpy as np
+        from scipy import sparse
+
+        pairs = [(index.position[pid], w) for pid, w in self.weights.items() if pid in index.position]
+        vector = None
+        if pairs:
+            block = index.block(field)
+            positions, weights = zip(*pairs)
+            weights = sparse.csr_matrix(np.asarray(weights, dtype=block.dtype)[None, :])
+            vector = weights.dot(block[list(positions)]).toarray().ravel()
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm > 0 else None
+        self._vector = (weakref.ref(index), vector)
+        return vector
+
+    def seen_positions(self, index):
+        return [index.position[pid] for pid in self.weights if pid in index.position]
+
+
+def encode_weights(weights):
+    """(product_ids, bytes float32) pentru tabela user_taste_vectors."""
+    import numpy as np
+    return list(weights), np.asarray(list(weights.values()), dtype=np.float32).tobytes()
+
+
+def decode_weights(product_ids, data):
+    import numpy as np
+    return dict(zip(product_ids, np.frombuffer(bytes(data), dtype=np.float32).tolist()))
+
+
+def ensure_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS user_taste_vectors (
+            user_id INTEGER PRIMARY KEY REFERENCES users(id),
+            product_ids TEXT[] NOT NULL,
+            weights BYTEA NOT NULL,
+            reference_time DOUBLE PRECISION NOT NULL,
+            last_history_id INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    # rândurile noi din istoric ale unui utilizator, fără scanarea tabelei
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_user_id
+        ON recommendation_history (user_id, id);
+    """)
+
+
+class TasteStore:
+    """
+    Profilurile de gust: cache în memorie + tabela user_taste_vectors.
+
+    half_life (secunde): după cât timp o vizualizare contează pe jumătate;
+    max_products: câte produse se păstrează per utilizator (cele mai grele).
+    """
+
+    def __init__(self, half_life, max_products=200, cache_size=10000, cache_ttl=300.0):
+        self.half_life = half_life
+        self.max_products = max_products
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    def _apply(self, profile, events):
+        """events: (id din istoric, product_id, moment în secunde), crescător după id."""
+        for event_id, product_id, at in events:
+            profile.add(product_id, 1.0, at, self.half_life, self.max_products)
+            profile.last_history_id = event_id
+
+    def _catch_up(self, cur, user_id, profile):
+        """Aplică rândurile din istoric de după profile.last_history_id (cel mult MAX_CATCH_UP_ROWS, cele mai noi)."""
+        cur.execute("""
+            SELECT id, product_id, created_at FROM recommendation_history
+            WHERE user_id = %s AND id > %s AND product_id IS NOT NULL
+            ORDER BY id DESC LIMIT %s
+        """, (user_id, profile.last_history_id, MAX_CATCH_UP_ROWS))
+        rows = cur.fetchall()
+        if rows:
+            now = time.time()
+            self._apply(profile, [(event_id, product_id, created_at.timestamp() if created_at else now)
+                                  for event_id, product_id, created_at in reversed(rows)])
+        return bool(rows)
+
+    def load(self, cur, user_id):
+        """Profilul din tabelă, adus la zi cu rândurile noi din istoric."""
+        cur.execute("""
+            SELECT product_ids, weights, reference_time, last_history_id
+            FROM user_taste_vectors WHERE user_id = %s
+        """, (user_id,))
+        row = cur.fetchone()
+        if row:
+            profile = TasteProfile(decode_weights(row[0], row[1]), row[2], row[3])
+        else:
+            profile = TasteProfile()
+
+        if self._catch_up(cur, user_id, profile):
+            self.save(cur, user_id, profile)
+        return profile
+
+    def get(self, cur, user_id):
+        """Profilul din cache sau, la miss, din baza de date."""
+        profile = self.cache.get(user_id)
+        if profile is None:
+            profile = self.load(cur, user_id)
+            self.cache.set(user_id, profile)
+        return profile
+
+    def record(self, cur, user_id, event_id):
+        """
+        Actualizare după un rând nou (deja salvat) în istoric: profilul din
+        cache se aduce la zi din istoric, deci include și rândurile scrise
+        de alți workeri. Dacă tabela are deja un profil mai nou (salvat de
+        alt worker), cel din cache se înlocuiește cu unul reîncărcat. Dacă
+        profilul nu e în cache nu se face nimic: următoarea încărcare
+        citește rândul.
+        """
+        profile = self.cache.get(user_id)
+        if profile is None:
+            return
+        with profile.lock:
+            if event_id <= profile.last_history_id:
+                return
+            self._catch_up(cur, user_id, profile)
+            if self.save(cur, user_id, profile):
+                return
+        self.cache.set(user_id, self.load(cur, user_id))
+
+    def save(self, cur, user_id, profile):
+        """
+        Upsert-ul profilului; nu înlocuiește un rând care include deja cel
+        puțin aceleași evenimente. Returnează True dacă rândul a fost scris.
+        """
+        product_ids, data = encode_weights(profile.weights)
+        cur.execute("""
+            INSERT INTO user_taste_vectors
+                (user_id, product_ids, weights, reference_time, last_history_id, updated_at)
+            VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (user_id) DO UPDATE SET
+                product_ids = EXCLUDED.product_ids,
+                weights = EXCLUDED.weights,
+                reference_time = EXCLUDED.reference_time,
+                last_history_id = EXCLUDED.last_history_id,
+                updated_at = EXCLUDED.updated_at
+            WHERE user_taste_vectors.last_history_id < EXCLUDED.last_history_id
+        """, (user_id, product_ids, data, profile.reference_time, profile.last_history_id))
+        return cur.rowcount == 1
+
+    def invalidate(self, user_id):
+        self.cache.invalidate(user_id)
+
+
+def recommend_for_taste(index, profile, field, N, mask):
+    """
+    Pozițiile celor mai apropiate N produse de gustul utilizatorului,
+    dintre cele din mask, fără produsele deja văzute. None dacă profilul
+    nu are niciun produs din catalogul curent.
+    """
+    from recommendations import top_n
+
+    with profile.lock:
+        vector = profile.vector(index, field)
+        seen = profile.seen_positions(index)
+    if vector is None:
+        return None
+    scores = index.block(field).dot(vector)
+    allowed = index.valid & mask
+    allowed[seen] = False
+    return top_n(scores, allowed, N)
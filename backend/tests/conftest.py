@@ -0,0 +1,104 @@
+"""
+Fixture-uri comune: un catalog mic în memorie (index) și o bază de date
+Postgres pentru testele endpoint-urilor.
+
+TEST_DATABASE_URL setat: se folosește baza dată (testele nu șterg nimic,
+creează doar utilizatori cu email-uri unice). Altfel se pornește un
+Postgres temporar cu initdb / pg_ctl din PATH; fără ele testele se sar.
+"""
+
+import os
+import shutil
+import socket
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# modulele backend-ului se importă direct (app, async_app, auth, ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommendations import ProductIndex  # noqa: E402
+
+
+def make_catalog(rows):
+    columns = ["product_id", "product_name", "brand_name", "loves_count", "rating", "reviews",
+               "ingredients", "price_usd", "highlights", "secondary_category", "assigned_skin_type"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+CATALOG = make_catalog([
+    ("P1", "Crema hidratanta", "A", 500, 4.5, 120, "['Water, Glycerin, Parfum']", 30.0,
+     "['Hydrating', 'Fragrance Free']", "Moisturizers", "dry"),
+    ("P2", "Ser vitamina C", "B", 900, 4.1, 80, "['Water, Ascorbic Acid']", 55.0,
+     "['Vitamin C', 'Brightening']", "Treatments", "all"),
+    ("P3", "Lotiune", "A", 100, np.nan, 5, "['Water, Fragrance, Alcohol']", 12.0,
+     "['Fragrance']", "Moisturizers", "oily"),
+    ("P4", "Gel curatare", "C", 300, 3.9, np.nan, "['Water, Salicylic Acid']", np.nan,
+     "['Clean at Sephora']", np.nan, np.nan),
+    ("P5", "Balsam buze", "C", 700, 4.8, 300, "['Shea Butter']", 18.0,
+     "['Vegan']", "Lip Balms", "normal"),
+])
+
+
+@pytest.fixture
+def catalog():
+    return CATALOG.copy()
+
+
+@pytest.fixture(scope="session", params=[False, True], ids=["full", "lean"])
+def index(request):
+    """Indexul catalogului CATALOG, în modul complet și în modul lean."""
+    return ProductIndex(CATALOG, lean=request.param)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="session")
+def database_url(tmp_path_factory):
+    url = os.environ.get("TEST_DATABASE_URL")
+    if url:
+        yield url
+        return
+
+    initdb, pg_ctl = shutil.which("initdb"), shutil.which("pg_ctl")
+    if not initdb or not pg_ctl:
+        pytest.skip("initdb / pg_ctl lipsesc din PATH; setează TEST_DATABASE_URL")
+    if hasattr(os, "geteuid") and os.geteuid() == 0:
+        pytest.skip("Postgres nu pornește ca root; setează TEST_DATABASE_URL")
+
+    root = tmp_path_factory.mktemp("postgres")
+    data, sockets = root / "data", root / "sockets"
+    sockets.mkdir()
+    port = _free_port()
+    subprocess.run([initdb, "-D", str(data), "-U", "postgres", "-A", "trust"],
+                   check=True, stdout=subprocess.DEVNULL)
+    subprocess.run([pg_ctl, "-D", str(data), "-w", "-l", str(root / "postgres.log"),
+                    "-o", f"-p {port} -k {sockets} -c listen_addresses=''", "start"],
+                   check=True, stdout=subprocess.DEVNULL)
+    try:
+        yield f"postgresql://postgres@/postgres?host={sockets}&port={port}"
+    finally:
+        subprocess.run([pg_ctl, "-D", str(data), "-m", "immediate", "stop"], stdout=subprocess.DEVNULL)
+
+
+@pytest.fixture(scope="session")
+def database(database_url):
+    """DATABASE_URL setat pentru ambele servere și schema creată prin app.init_db."""
+    previous = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = database_url
+    import app
+    app.init_db()
+    try:
+        yield database_url
+    finally:
+        if previous is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = previous
@@ -0,0 +1,46 @@
+"""Validarea cererilor în app.py (fără bază de date: erorile apar înainte de catalog)."""
+
+import pytest
+
+app = pytest.importorskip("app")
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+@pytest.mark.parametrize("weights", [
+    {"highlights": [1]},
+    {"highlights": None},
+    {"highlights": "1"},
+    {"highlights": True},
+    [["highlights", 1]],
+    "highlights",
+])
+def test_malformed_weights_are_rejected(client, weights):
+    response = client.post("/api/recommendations", json={"product_id": "P1", "weights": weights})
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_parse_weights():
+    assert app.parse_weights(None) is None
+    assert app.parse_weights({"highlights": 1, "rating": 0.5}) == {"highlights": 1.0, "rating": 0.5}
+    with pytest.raises(ValueError):
+        app.parse_weights({"highlights": float("nan")})
+
+
+def test_own_profile_notifications_are_ignored(monkeypatch):
+    from auth import profile_notification
+
+    monkeypatch.setattr(app, "profile_cache", app.TTLCache())
+    app.profile_cache.set(7, ("oily", []))
+    # notificarea trimisă de update_user din acest proces: cache-ul are deja profilul nou
+    own = profile_notification(7, "oily", [], origin=app.profile_origin())
+    assert app.handle_profile_change(own) is False
+    assert app.profile_cache.get(7) == ("oily", [])
+
+    other = profile_notification(7, "dry", [], origin="alt-proces:1")
+    assert app.handle_profile_change(other) is True
+    assert app.profile_cache.get(7) is None
@@ -0,0 +1,196 @@
+"""
+Endpoint-urile asincrone (async_app.py) pe un Postgres real.
+
+Rulare:
+    TEST_DATABASE_URL=postgresql://... python -m pytest -q tests
+"""
+
+import asyncio
+import json
+import time
+import uuid
+
+import pytest
+
+pytest.importorskip("quart")
+pytest.importorskip("asyncpg")
+
+import async_app
+
+
+def run(scenario):
+    """Rulează scenario(client) cu serverul pornit (pool deschis / închis)."""
+    async def main():
+        async with async_app.app.test_app() as test_app:
+            return await scenario(test_app.test_client())
+    return asyncio.run(main())
+
+
+def new_user(**overrides):
+    user = {
+        "email": f"{uuid.uuid4().hex}@example.com",
+        "password": "parola123",
+        "name": "Test",
+        "gender": "female",
+        "age_range": "26-35",
+        "skin_type": "dry",
+        "allergies": ["parabeni"],
+    }
+    user.update(overrides)
+    return user
+
+
+async def register(client, user):
+    response = await client.post("/api/register", json=user)
+    return response.status_code, await response.get_json()
+
+
+def query_one(sql, params):
+    import app
+    conn = app.get_db_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        return cur.fetchone()
+    finally:
+        conn.close()
+
+
+def test_register_and_duplicate_email(database):
+    user = new_user()
+
+    async def scenario(client):
+        first = await register(client, user)
+        second = await register(client, user)
+        missing = await register(client, {"email": user["email"]})
+        return first, second, missing
+
+    (status, body), (dup_status, dup_body), (missing_status, _) = run(scenario)
+    assert status == 201 and body["success"] and isinstance(body["user_id"], int)
+    assert dup_status == 400 and dup_body["error"] == "Email-ul este deja înregistrat!"
+    assert missing_status == 400
+
+    row = query_one("SELECT skin_type, allergies FROM users WHERE id = %s", (body["user_id"],))
+    assert row == ("dry", ["parabeni"])
+
+
+def test_login_sets_last_login(database):
+    user = new_user()
+
+    async def scenario(client):
+        _, body = await register(client, user)
+        wrong = await client.post("/api/login", json={"email": user["email"], "password": "gresit"})
+        ok = await client.post("/api/login", json={"email": user["email"], "password": user["password"]})
+        return body["user_id"], wrong.status_code, ok.status_code, await ok.get_json()
+
+    user_id, wrong_status, status, body = run(scenario)
+    assert wrong_status == 401
+    assert status == 200
+    assert body["user"] == {
+        "id": user_id, "email": user["email"], "name": "Test", "gender": "female",
+        "age_range": "26-35", "skin_type": "dry", "allergies": ["parabeni"]
+    }
+    assert query_one("SELECT last_login FROM users WHERE id = %s", (user_id,))[0] is not None
+
+
+def test_get_and_update_user(database):
+    user = new_user()
+
+    async def scenario(client):
+        _, body = await register(client, user)
+        user_id = body["user_id"]
+        before = await (await client.get(f"/api/user/{user_id}")).get_json()
+        empty = await client.put(f"/api/user/{user_id}", json={})
+        updated = await client.put(f"/api/user/{user_id}",
+                                   json={"skin_type": "oily", "allergies": ["parfum", "alcool"]})
+        after = await (await client.get(f"/api/user/{user_id}")).get_json()
+        missing = await client.get("/api/user/999999999")
+        return before, empty.status_code, updated.status_code, after, missing.status_code
+
+    before, empty_status, status, after, missing_status = run(scenario)
+    assert before["user"]["skin_type"] == "dry"
+    assert empty_status == 400
+    assert status == 200
+    assert after["user"]["skin_type"] == "oily"
+    assert after["user"]["allergies"] == ["parfum", "alcool"]
+    assert missing_status == 404
+
+
+def test_update_notifies_and_invalidates_flask_profile_cache(database):
+    import app
+
+    app.listen_profile_changes()
+    assert app.profile_listener_ready.wait(10), "ascultătorul PROFILE_CHANNEL nu s-a conectat"
+
+    async def scenario(client):
+        _, body = await register(client, new_user())
+        user_id = body["user_id"]
+        # profilul vechi, ca după o cerere de recomandări servită de Flask
+        app.profile_cache.set(user_id, ("dry", ["parabeni"]))
+        await client.put(f"/api/user/{user_id}", json={"allergies": ["parabeni", "parfum"]})
+        return user_id
+
+    user_id = run(scenario)
+    deadline = time.monotonic() + 5
+    while app.profile_cache.get(user_id) is not None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert app.profile_cache.get(user_id) is None
+    # următoarea citire vede alergenul nou
+    assert app.get_user_profile(user_id) == ("dry", ["parabeni", "parfum"])
+
+
+def test_name_update_does_not_notify(database):
+    import app
+    conn = app.get_db_connection()
+    conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute(f"LISTEN {async_app.PROFILE_CHANNEL};")
+
+    async def scenario(client):
+        _, body = await register(client, new_user())
+        await client.put(f"/api/user/{body['user_id']}", json={"name": "Alt nume"})
+        await client.put(f"/api/user/{body['user_id']}", json={"skin_type": "normal"})
+        return body["user_id"]
+
+    try:
+        user_id = run(scenario)
+        conn.poll()
+        payloads = [json.loads(n.payload) for n in conn.notifies if json.loads(n.payload)["user_id"] == user_id]
+    finally:
+        conn.close()
+    assert payloads == [{"user_id": user_id, "skin_type": "normal", "allergies": ["parabeni"]}]
+
+
+def test_forgot_password(database):
+    user = new_user()
+
+    async def scenario(client):
+        await register(client, user)
+        known = await client.post("/api/forgot-password", json={"email": user["email"]})
+        unknown = await client.post("/api/forgot-password", json={"email": "nimeni@example.com"})
+        empty = await client.post("/api/forgot-password", json={"email": "  "})
+        return (known.status_code, await known.get_json(), unknown.status_code,
+                await unknown.get_json(), empty.status_code)
+
+    status, body, unknown_status, unknown_body, empty_status = run(scenario)
+    # același răspuns, ca să nu se dezvăluie dacă email-ul există
+    assert status == unknown_status == 200
+    assert body == unknown_body
+    assert empty_status == 400
+
+
+def test_pool_exhausted_returns_503(database, monkeypatch):
+    monkeypatch.setattr(async_app, "ASYNC_DB_POOL_MIN", 1)
+    monkeypatch.setattr(async_app, "ASYNC_DB_POOL_MAX", 1)
+    monkeypatch.setattr(async_app, "ASYNC_DB_ACQUIRE_TIMEOUT", 0.2)
+
+    async def scenario(client):
+        async with async_app.pool.acquire():
+            busy = await client.get("/api/user/1")
+        free = await client.get("/api/user/999999999")
+        return busy.status_code, busy.headers.get("Retry-After"), await busy.get_json(), free.status_code
+
+    status, retry_after, body, free_status = run(scenario)
+    assert status == 503 and retry_after == "1"
+    assert body["success"] is False
+    assert free_status == 404
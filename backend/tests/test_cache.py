@@ -0,0 +1,159 @@
+"""Cache-urile in-process din cache.py."""
+
+import threading
+import time
+
+import pytest
+
+from cache import SingleFlight, SingleFlightTimeout, TTLCache
+
+
+def test_get_set_and_expiry():
+    cache = TTLCache(maxsize=10, ttl=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a", "lipsă") == "lipsă"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_stale_read_does_not_overwrite_invalidation():
+    cache = TTLCache()
+    generation = cache.generation(1)       # citirea din DB începe
+    cache.invalidate(1)                    # între timp profilul se modifică
+    assert cache.set(1, "vechi", generation=generation) is False
+    assert cache.get(1) is None
+
+
+def test_stale_read_does_not_overwrite_write_through():
+    cache = TTLCache()
+    generation = cache.generation(1)
+    cache.set(1, "nou")
+    assert cache.set(1, "vechi", generation=generation) is False
+    assert cache.get(1) == "nou"
+    # o citire începută după scriere se poate pune în cache
+    assert cache.set(1, "recitit", generation=cache.generation(1)) is True
+
+
+def test_generations_are_per_key():
+    cache = TTLCache()
+    generation = cache.generation(1)
+    cache.invalidate(2)
+    assert cache.set(1, "profil", generation=generation) is True
+
+
+def test_clear_invalidates_generations_read_before():
+    cache = TTLCache()
+    generation = cache.generation(1)
+    cache.clear()
+    assert cache.set(1, "vechi", generation=generation) is False
+    assert cache.set(1, "nou", generation=cache.generation(1)) is True
+
+
+def test_forgotten_generation_still_rejects_stale_read():
+    # cu maxsize=2, generația cheii 1 iese din evidență după alte scrieri
+    cache = TTLCache(maxsize=2)
+    generation = cache.generation(1)
+    cache.invalidate(1)
+    cache.set(2, "b")
+    cache.set(3, "c")
+    assert cache.set(1, "vechi", generation=generation) is False
+
+
+def run_concurrently(flight, key, fn, callers, timeout=None):
+    """Pornește `callers` apeluri flight.do(key, fn) și returnează rezultatele / excepțiile lor."""
+    results = [None] * callers
+
+    def call(i):
+        try:
+            results[i] = flight.do(key, fn, timeout=timeout)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "rezultat"
+
+    threads, results = run_concurrently(flight, "k", compute, 5)
+    while flight.stats()["coalesced"] < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["rezultat"] * 5
+    assert len(calls) == 1
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_single_flight_error_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise ValueError("eșec")
+
+    threads, results = run_concurrently(flight, "k", compute, 3)
+    while flight.stats()["coalesced"] < 2:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(r, ValueError) and str(r) == "eșec" for r in results)
+    assert flight.stats()["errors"] == 1
+    # eroarea nu rămâne în cache: următorul apel calculează din nou
+    assert flight.do("k", lambda: "ok") == "ok"
+
+
+def test_single_flight_waiter_timeout():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        return "târziu"
+
+    leader, leader_result = run_concurrently(flight, "k", compute, 1)
+    while flight.stats()["in_flight"] == 0:
+        time.sleep(0.01)
+    with pytest.raises(SingleFlightTimeout):
+        flight.do("k", compute, timeout=0.05)
+    # calculul liderului continuă și se termină normal
+    release.set()
+    leader[0].join()
+    assert leader_result == ["târziu"]
+    assert flight.stats()["timeouts"] == 1
+
+
+def test_single_flight_keys_are_independent_and_not_cached():
+    flight = SingleFlight()
+    counter = iter(range(10))
+    assert flight.do("a", lambda: next(counter)) == 0
+    assert flight.do("b", lambda: next(counter)) == 1
+    assert flight.do("a", lambda: next(counter)) == 2
+    assert flight.stats()["coalesced"] == 0
@@ -0,0 +1,147 @@
+"""Reîncărcarea catalogului (catalog.py) și importul CSV din app.py, fără bază de date."""
+
+import csv
+import os
+import time
+
+import pytest
+
+from catalog import CatalogManager
+
+HEADER = ["product_id", "product_name", "brand_name", "price_usd", "out_of_stock"]
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_watcher_waits_until_the_file_stops_changing(tmp_path):
+    source = tmp_path / "products.csv"
+    write_csv(source, [("P1", "Crema", "A", "10", "0")])
+    builds = []
+    manager = CatalogManager(lambda: builds.append(os.path.getsize(source)) or [], str(source))
+    manager.get()
+
+    manager.start_watcher(0.2)
+    # fișierul se schimbă de câteva ori între două verificări: nicio
+    # reîncărcare cât se scrie
+    with open(source, "a", encoding="utf-8") as f:
+        for i in range(20):
+            f.write(f"P{i + 2},Crema,A,10,0\n")
+            f.flush()
+            os.utime(source, (time.time(), time.time() + i + 1))
+            time.sleep(0.05)
+            assert len(builds) == 1
+    final_size = os.path.getsize(source)
+
+    assert wait_for(lambda: len(builds) == 2)
+    assert builds[1] == final_size
+    time.sleep(0.3)
+    assert len(builds) == 2
+
+
+class FakeCursor:
+    def __init__(self, log):
+        self.log = log
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        self.log.append(" ".join(sql.split()))
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.log = []
+        self.committed = False
+        self.rolled_back = False
+
+    def cursor(self):
+        return FakeCursor(self.log)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    app = pytest.importorskip("app")
+    connection = FakeConnection()
+    monkeypatch.setattr(app, "get_db_connection", lambda: connection)
+    return app, connection
+
+
+def test_truncated_csv_fails_the_upsert(tmp_path, app_module):
+    app, connection = app_module
+    source = tmp_path / "products.csv"
+    write_csv(source, [("P1", "Crema", "A", "10", "0")])
+    # ultimul rând tăiat la jumătate, ca într-un fișier încă în curs de scriere
+    with open(source, "a", encoding="utf-8") as f:
+        f.write("P2,Ser vit")
+
+    with pytest.raises(ValueError, match="linia 3"):
+        app.import_csv(str(source), upsert=True, missing="delete")
+    assert connection.rolled_back and not connection.committed
+    assert not any(sql.startswith("DELETE") for sql in connection.log)
+
+
+@pytest.mark.parametrize("missing, statement", [
+    ("keep", None),
+    ("out_of_stock", "UPDATE products SET out_of_stock = 1"),
+    ("delete", "DELETE FROM products"),
+])
+def test_products_missing_from_csv(tmp_path, app_module, missing, statement):
+    app, connection = app_module
+    source = tmp_path / "products.csv"
+    write_csv(source, [("P1", "Crema", "A", "10", "0")])
+
+    app.import_csv(str(source), upsert=True, missing=missing)
+    assert connection.committed
+    removals = [sql for sql in connection.log if sql.startswith(("DELETE", "UPDATE"))]
+    if statement is None:
+        assert removals == []
+    else:
+        assert len(removals) == 1 and removals[0].startswith(statement)
+
+
+def test_initial_import_skips_incomplete_rows(tmp_path, app_module):
+    app, connection = app_module
+    source = tmp_path / "products.csv"
+    write_csv(source, [("P1", "Crema", "A", "10", "0"), ("P2", "", "B", "5", "0"), ("P3", "Ser", "B", "", "0")])
+
+    app.import_csv(str(source))
+    inserts = [sql for sql in connection.log if sql.startswith("INSERT")]
+    assert len(inserts) == 1 and connection.committed
+
+
+@pytest.mark.parametrize("row, problem", [
+    ({"product_id": "P1", "product_name": "Crema", "brand_name": "A", "price_usd": "10"}, None),
+    ({"product_id": "P1", "product_name": "Crema", "brand_name": "A", "price_usd": None}, "coloane"),
+    ({"product_id": "P1", "product_name": " ", "brand_name": "A", "price_usd": "10"}, "product_name"),
+    ({"product_id": "P1", "product_name": "Crema", "brand_name": "A", "price_usd": "zece"}, "price_usd"),
+])
+def test_invalid_product_row(row, problem):
+    app = pytest.importorskip("app")
+    result = app.invalid_product_row(row)
+    assert result is None if problem is None else problem in result
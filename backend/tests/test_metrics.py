@@ -0,0 +1,42 @@
+"""Estimările de durată folosite de bugetul de latență (metrics.py)."""
+
+from metrics import MovingAverage, StageEstimates
+
+
+def test_moving_average_first_sample_then_ema():
+    average = MovingAverage(alpha=0.5)
+    assert average.update(2.0) == 2.0
+    assert average.update(4.0) == 3.0
+    assert average.decay(0.5) == 1.5
+
+
+def test_unmeasured_stage_runs():
+    estimates = StageEstimates()
+    assert estimates.estimate("tfidf") == 0.0
+    assert estimates.should_run("tfidf", 2.0)
+    assert not estimates.should_run("tfidf", 0)
+
+
+def test_slow_sample_does_not_lock_stage_out():
+    # un singur eșantion lent (2.5s) peste un buget de 2s
+    estimates = StageEstimates(decay=0.8, probe_every=10)
+    estimates.update("tfidf", 2.5)
+    assert not estimates.should_run("tfidf", 2.0)
+    # refuzul scade estimarea sub buget: următoarea cerere rulează
+    assert estimates.estimate("tfidf") == 2.0
+    assert estimates.should_run("tfidf", 2.0)
+
+
+def test_stage_is_probed_after_consecutive_refusals():
+    estimates = StageEstimates(decay=1.0, probe_every=3)
+    estimates.update("jaccard", 10.0)
+    runs = [estimates.should_run("jaccard", 1.0) for _ in range(6)]
+    assert runs == [False, False, True, False, False, True]
+
+
+def test_estimates_are_per_mode():
+    estimates = StageEstimates()
+    estimates.update("jaccard_weighted", 5.0)
+    assert not estimates.should_run("jaccard_weighted", 1.0)
+    assert estimates.should_run("tfidf", 1.0)
+    assert estimates.snapshot()["jaccard_weighted"] == 4000.0
@@ -0,0 +1,121 @@
+"""ProductIndex și filtrele din recommendations.py, pe un catalog mic în memorie."""
+
+import numpy as np
+import pytest
+
+
+def test_category_mask(index):
+    assert np.flatnonzero(index.category_mask(" moisturizers ")).tolist() == [0, 2]
+    assert not index.category_mask("Inexistenta").any()
+
+
+@pytest.mark.parametrize("category", [None, np.nan, "", "  "])
+def test_missing_category_does_not_restrict(index, category):
+    assert index.category_mask(category).all()
+
+
+def test_popularity_fallback_without_category(index):
+    app = pytest.importorskip("app")
+    # P4 nu are categorie (NaN în CSV-ul lean): fallback-ul nu se restrânge la categorie
+    positions = app.popularity_fallback(index, 3, 10, None, [], {"min_price": 15})
+    assert index.product_ids[positions].tolist() == ["P2", "P5", "P1"]
+
+
+def test_scores_multiply_only_weighted_blocks(index):
+    combined = index.block("final_description")
+    expected = combined.dot(combined[0].T).toarray().ravel()
+    assert np.allclose(index.scores(0), expected)
+
+    highlights = index.block("highlights")
+    cosine = highlights.dot(highlights[0].T).toarray().ravel()
+    assert np.allclose(index.scores(0, {"highlights": 2.0, "ingredients": 0}), cosine)
+
+
+def test_normalize_columns_in_process_pool_matches_serial(catalog):
+    from recommendations import normalize_columns
+
+    columns = ["highlights", "ingredients"]
+    serial = normalize_columns(catalog, columns)
+    pooled = normalize_columns(catalog, columns, n_jobs=2, chunk_size=2)
+    assert pooled.equals(serial)
+    assert serial.loc[0, "highlights"] == "['hydrating', 'fragrance free']"
+
+
+def test_sorted_column_index_skips_nan():
+    from recommendations import SortedColumnIndex
+
+    column = SortedColumnIndex(np.array([3.0, np.nan, 1.0, 2.0, np.nan, 2.0]))
+    assert sorted(column.positions().tolist()) == [0, 2, 3, 5]
+    # capete incluse
+    assert sorted(column.positions(2.0, 3.0).tolist()) == [0, 3, 5]
+    assert column.positions(low=3.5).tolist() == []
+    assert column.mask(high=1.0).tolist() == [False, False, True, False, False, False]
+
+
+def test_range_mask(index):
+    # fără filtre trec toate, inclusiv produsele fără preț / rating
+    assert index.range_mask().all()
+    # P4 nu are preț, P3 nu are rating, P4 nu are recenzii: nu trec filtrele lor
+    assert index.product_ids[index.range_mask(min_price=10, max_price=30)].tolist() == ["P1", "P3", "P5"]
+    assert index.product_ids[index.range_mask(min_rating=4.0)].tolist() == ["P1", "P2", "P5"]
+    assert index.product_ids[index.range_mask(min_reviews=0)].tolist() == ["P1", "P2", "P3", "P5"]
+    assert index.product_ids[index.range_mask(max_price=40, min_rating=4.5, min_reviews=100)].tolist() == ["P1", "P5"]
+
+
+def test_keyword_matcher():
+    from recommendations import KeywordMatcher
+
+    matcher = KeywordMatcher(["Vegan", "vegan", "", "(aqua"])
+    assert matcher.terms == ("vegan", "(aqua")
+    texts = np.array(["vegan formula", "water (aqua, eau)", "fara"], dtype=object)
+    assert matcher.matches(texts).tolist() == [True, True, False]
+    assert matcher.mask(texts, "none").tolist() == [False, False, True]
+    with pytest.raises(ValueError):
+        matcher.mask(texts, "all")
+
+    empty = KeywordMatcher("")
+    assert not empty
+    assert not empty.matches(texts).any()
+
+
+def test_keyword_does_not_match_across_list_items():
+    from recommendations import KeywordMatcher, searchable_text
+
+    texts = searchable_text(["['Hydrating', 'Fragrance Free']", np.nan, "text simplu"])
+    assert texts.tolist()[1:] == ["", "text simplu"]
+    assert KeywordMatcher("fragrance free").matches(texts).tolist() == [True, False, False]
+    assert not KeywordMatcher("hydrating fragrance").matches(texts).any()
+
+
+def test_filter_keeps_rows_with_any_keyword(catalog):
+    from recommendations import filter
+
+    assert filter(catalog, "highlights", "fragrance")["product_id"].tolist() == ["P1", "P3"]
+    assert filter(catalog, "highlights", ["vegan", "VITAMIN C"])["product_id"].tolist() == ["P2", "P5"]
+    assert len(filter(catalog, "highlights", "")) == len(catalog)
+
+
+def test_filter_out_drops_rows_with_any_keyword(catalog):
+    from recommendations import filter, filter_out
+
+    # Regresie: filter_out elimină orice rând care conține cuvântul într-un
+    # element al listei. Varianta veche păstra P1 (['Hydrating', 'Fragrance
+    # Free']) pentru că "Hydrating" nu conține cuvântul. Acum filter_out este
+    # exact complementul lui filter (P4, fără highlights, rămâne).
+    assert filter_out(catalog, "highlights", "fragrance")["product_id"].tolist() == ["P2", "P4", "P5"]
+    assert filter_out(catalog, "highlights", ["fragrance", "vegan"])["product_id"].tolist() == ["P2", "P4"]
+    kept = set(filter_out(catalog, "highlights", "vitamin")["product_id"])
+    dropped = set(filter(catalog, "highlights", "vitamin")["product_id"])
+    assert kept | dropped == set(catalog["product_id"]) and not kept & dropped
+
+
+def test_keyword_and_allergen_masks(index):
+    assert index.product_ids[index.keyword_mask("fragrance")].tolist() == ["P1", "P3"]
+    candidates = index.range_mask(min_price=20)
+    assert index.product_ids[index.keyword_mask("fragrance", candidates)].tolist() == ["P1"]
+    assert index.product_ids[index.keyword_mask("fragrance", mode="none")].tolist() == ["P2", "P4", "P5"]
+
+    # alergenii se caută în numele canonice ale ingredientelor
+    assert index.product_ids[index.ingredient_mask(["parfum", "ALCOHOL"])].tolist() == ["P1", "P3"]
+    assert index.product_ids[index.allergen_free_mask(["parfum", "fragrance"])].tolist() == ["P2", "P4", "P5"]
+    assert index.allergen_free_mask([]).all()
@@ -0,0 +1,28 @@
+"""Vectorii de gust (taste.py): scorarea pe blocul TF-IDF al indexului."""
+
+import numpy as np
+
+from taste import TasteProfile, recommend_for_taste
+
+
+def test_recommend_for_taste_matches_centroid_cosine(index):
+    profile = TasteProfile({"P1": 1.0, "P3": 0.5})
+    positions = recommend_for_taste(index, profile, "final_description", 5, np.ones(len(index), dtype=bool))
+
+    block = index.block("final_description")
+    centroid = (block[0] * 1.0 + block[2] * 0.5).toarray().ravel()
+    expected = block.dot(centroid / np.linalg.norm(centroid))
+    # produsele văzute (P1, P3) nu se recomandă
+    assert positions.tolist() == sorted([1, 3, 4], key=lambda p: -expected[p])
+
+
+def test_taste_vector_is_cached_per_index(index):
+    profile = TasteProfile({"P2": 1.0})
+    vector = profile.vector(index, "final_description")
+    assert profile.vector(index, "final_description") is vector
+    assert np.isclose(np.linalg.norm(vector), 1.0)
+
+
+def test_profile_without_catalog_products(index):
+    profile = TasteProfile({"P999": 1.0})
+    assert recommend_for_taste(index, profile, "final_description", 5, np.ones(len(index), dtype=bool)) is None
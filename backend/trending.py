@@ -0,0 +1,163 @@
+"""
+Produse în trend din recommendation_history, cu contoare cu decădere exponențială.
+
+Fiecare rând din istoric înseamnă o vizualizare (product_id, produsul de
+referință) și câteva recomandări afișate (recommended_products). Scorul
+unui produs este suma ponderilor evenimentelor, fiecare înjumătățită la
+fiecare half_life secunde. Contoarele se actualizează la fiecare rând nou
+scris și se reconstruiesc la pornire dintr-o scanare în flux, limitată în
+timp și număr de rânduri, a tabelei; clasamentul e un top-K cu heap, fără
+GROUP BY pe istoric la servire.
+
+Decăderea folosește "forward decay": valorile se rețin relativ la un
+moment de referință (origin), deci un eveniment nou nu atinge celelalte
+contoare; referința se mută rar, când exponenții devin prea mari.
+"""
+
+import heapq
+import math
+import threading
+import time
+
+# Peste acest exponent (e^50) valorile se rescalează la o referință nouă
+MAX_EXPONENT = 50.0
+# Contoarele sub acest scor (relativ la referință) se șterg la rescalare
+MIN_SCORE = 1e-6
+
+
+class DecayedCounter:
+    """Sume ponderate cu decădere exponențială, per cheie."""
+
+    def __init__(self, half_life, origin=None):
+        self.rate = math.log(2) / half_life
+        self.origin = time.time() if origin is None else origin
+        self.values = {}
+
+    def add(self, key, weight, at):
+        exponent = self.rate * (at - self.origin)
+        if exponent > MAX_EXPONENT:
+            self._rebase(at)
+            exponent = 0.0
+        self.values[key] = self.values.get(key, 0.0) + weight * math.exp(exponent)
+
+    def _rebase(self, origin):
+        factor = math.exp(-self.rate * (origin - self.origin))
+        self.values = {key: value * factor for key, value in self.values.items() if value * factor >= MIN_SCORE}
+        self.origin = origin
+
+    def score(self, value, now):
+        """Valoarea reținută convertită în scorul decăzut la momentul now."""
+        return value * math.exp(-self.rate * (now - self.origin))
+
+    def top(self, k, allowed=None, now=None):
+        """Primele k chei după scor (opțional doar cele acceptate de allowed)."""
+        items = self.values.items()
+        if allowed is not None:
+            items = ((key, value) for key, value in items if allowed(key))
+        # ordinea relativă nu depinde de momentul la care se citește
+        best = heapq.nlargest(k, items, key=lambda item: item[1])
+        now = time.time() if now is None else now
+        return [(key, self.score(value, now)) for key, value in best]
+
+
+class TrendingCounters:
+    """
+    Contoarele de trend pentru produse, actualizate din recommendation_history.
+
+    view_weight / recommended_weight: ponderea unei vizualizări, respectiv a
+    unei apariții într-o listă de recomandări.
+    """
+
+    def __init__(self, half_life, view_weight=1.0, recommended_weight=0.25):
+        self.half_life = half_life
+        self.view_weight = view_weight
+        self.recommended_weight = recommended_weight
+        self._counter = DecayedCounter(half_life)
+        self._lock = threading.Lock()
+        # rândurile cu id <= _scan_max sunt numărate de ultima reconstrucție
+        self._scan_max = None
+        self.events = 0
+        self.rebuilt_rows = 0
+        self.rebuild_seconds = None
+
+    def _add(self, product_id, recommended, at):
+        self._counter.add(product_id, self.view_weight, at)
+        for pid in recommended or []:
+            self._counter.add(pid, self.recommended_weight, at)
+        self.events += 1
+
+    def record(self, event_id, product_id, recommended, at=None):
+        """Adaugă un rând nou din recommendation_history."""
+        at = min(time.time() if at is None else at, time.time())
+        with self._lock:
+            if self._scan_max is not None and event_id <= self._scan_max:
+                return
+            self._add(product_id, recommended, at)
+
+    def rebuild(self, conn, max_age=None, max_rows=500000, batch_size=5000):
+        """
+        Reconstruiește contoarele din tabela recommendation_history.
+
+        Scanarea folosește un cursor pe server (named cursor), deci rândurile
+        vin în loturi de batch_size; se citesc doar rândurile mai noi de
+        max_age secunde (implicit 10 perioade de înjumătățire) și cel mult
+        max_rows, cele mai recente.
+        """
+        started = time.perf_counter()
+        max_age = max_age or 10 * self.half_life
+        now = time.time()
+
+        cur = conn.cursor()
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM recommendation_history")
+        scan_max = cur.fetchone()[0]
+        cur.close()
+
+        # de aici înainte record() numără doar rândurile noi (id > scan_max);
+        # id-urile sunt crescătoare, deci restul le acoperă scanarea
+        with self._lock:
+            self._counter = DecayedCounter(self.half_life, origin=now)
+            self._scan_max = scan_max
+            self.events = 0
+
+        rows = 0
+        cur = conn.cursor(name="trending_scan")
+        cur.itersize = batch_size
+        try:
+            cur.execute("""
+                SELECT product_id, recommended_products, created_at
+                FROM recommendation_history
+                WHERE id <= %s AND created_at >= NOW() - make_interval(secs => %s)
+                ORDER BY id DESC
+                LIMIT %s
+            """, (scan_max, max_age, max_rows))
+            while True:
+                batch = cur.fetchmany(batch_size)
+                if not batch:
+                    break
+                with self._lock:
+                    for product_id, recommended, created_at in batch:
+                        at = min(created_at.timestamp(), now) if created_at else now
+                        self._add(product_id, recommended, at)
+                rows += len(batch)
+        finally:
+            cur.close()
+            conn.rollback()
+
+        self.rebuilt_rows = rows
+        self.rebuild_seconds = time.perf_counter() - started
+        return rows
+
+    def top(self, k, allowed=None):
+        """[(product_id, scor)] pentru primele k produse."""
+        with self._lock:
+            return self._counter.top(k, allowed)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "products": len(self._counter.values),
+                "events": self.events,
+                "half_life_hours": round(self.half_life / 3600, 2),
+                "rebuilt_rows": self.rebuilt_rows,
+                "rebuild_seconds": round(self.rebuild_seconds, 3) if self.rebuild_seconds is not None else None
+            }